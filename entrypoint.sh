@@ -1,4 +1,11 @@
 #!/bin/sh
+set -e
 
-python manage.py migrate
-python manage.py runserver 0.0.0.0:8000
+# SERVER=runserver starts the development server, applying migrations
+# first. Otherwise gunicorn serves the app; migrations are applied once
+# per deploy by the migrate service, not by every app container.
+if [ "${SERVER}" = "runserver" ]; then
+    python manage.py migrate
+    exec python manage.py runserver 0.0.0.0:8000
+fi
+exec gunicorn --config gunicorn.conf.py
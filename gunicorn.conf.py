@@ -0,0 +1,76 @@
+"""
+Gunicorn configuration for serving mysite in production.
+
+    gunicorn --config gunicorn.conf.py
+
+Settings come from the environment or .env like the Django settings.
+SERVER_INTERFACE picks the WSGI application, served by threaded sync
+workers, or the ASGI one, served by uvicorn workers (pair it with
+POLLS_ASYNC_VIEWS=True). The app is loaded once in the master before
+forking, so workers share its memory pages copy-on-write. Because of
+that, SIGHUP restarts the workers with the code already loaded; to
+deploy new code send SIGUSR2, which starts a new master with it, then
+SIGTERM to the old master once the new workers are up (or restart the
+container).
+
+Migrations are not run here; run "manage.py migrate" once per deploy.
+"""
+import os
+# decouple's config is imported under another name, as gunicorn reads
+# every module-level name here as one of its settings.
+from decouple import Choices, config as env
+
+SERVER_INTERFACE = env('SERVER_INTERFACE', default='wsgi',
+                       cast=Choices(['wsgi', 'asgi']))
+
+if SERVER_INTERFACE == 'asgi':
+    wsgi_app = 'mysite.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'mysite.wsgi:application'
+    worker_class = 'gthread'
+
+bind = env('BIND', default='0.0.0.0:8000')
+threads = env('GUNICORN_THREADS', default=4, cast=int)
+
+
+def default_workers():
+    """
+    The usual 2 x CPU + 1 processes, counting the CPUs this process may
+    run on (a container's CPU set, not the host's), capped so that the
+    workers' database connections stay within DB_MAX_CONNECTIONS.
+
+    A worker holds one persistent connection per thread, or up to
+    DB_POOL_MAX_SIZE with DB_POOL. Under ASGI without a pool the number
+    is not bounded; use DB_POOL there.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    if env('DB_POOL', default=False, cast=bool):
+        per_worker = env('DB_POOL_MAX_SIZE', default=10, cast=int)
+    else:
+        per_worker = threads
+    budget = env('DB_MAX_CONNECTIONS', default=80, cast=int)
+    return max(1, min(cpus * 2 + 1, budget // per_worker))
+
+
+# threads only apply to gthread workers
+workers = env('WEB_CONCURRENCY', default=default_workers(), cast=int)
+preload_app = True
+timeout = env('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot build up; the jitter
+# keeps them from all restarting at once.
+max_requests = env('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Drop any database connection inherited from the preloaded master."""
+    from django.db import connections
+    connections.close_all()
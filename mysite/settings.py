@@ -11,8 +11,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config, Csv
+from decouple import config, Choices, Csv
 import os
+import sys
 
 # Ensure test settings mirror development settings for middleware
 
@@ -30,6 +31,9 @@ SECRET_KEY = config('SECRET_KEY', default='fake-secret-key')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', default = False, cast = bool)
 
+# Whether this is a "manage.py test" run, which uses a single process.
+TESTING = sys.argv[1:2] == ['test']
+
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', 
                        default='localhost,127.0.0.1,testserver', 
@@ -49,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "polls.middleware.PerformanceMiddleware",
+    "polls.middleware.NPlusOneMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -56,9 +62,30 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "polls.middleware.ThrottleMiddleware",
 ]
 
-MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
+# Sessions: "db" is Django's default; "signed_cookies" keeps them in the
+# browser; "cached_db" reads them through the cache and writes the
+# database only when they change; "cache" keeps them in the cache alone.
+# The last two need a CACHE_BACKEND shared by every worker, or a logout
+# in one worker is not seen by the others (check polls.E001).
+SESSION_STORE = config('SESSION_STORE', default='db',
+                       cast=Choices(['db', 'cached_db', 'cache',
+                                     'signed_cookies']))
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_STORE}'
+
+# Flash messages go in a cookie, falling back to the session only when
+# they do not fit, so showing one does not write the session.
+MESSAGE_STORAGES = {
+    'fallback': 'django.contrib.messages.storage.fallback.FallbackStorage',
+    'cookie': 'django.contrib.messages.storage.cookie.CookieStorage',
+    'session': 'django.contrib.messages.storage.session.SessionStorage',
+}
+MESSAGE_STORAGE = MESSAGE_STORAGES[
+    config('MESSAGE_STORE', default='fallback',
+           cast=Choices(list(MESSAGE_STORAGES)))
+]
 
 
 
@@ -100,8 +127,90 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'win1234'),
         'HOST': os.getenv('POSTGRES_HOST', 'db'),
         'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        # Keep connections open between requests for this many seconds
+        # (0 closes them after every request) and check them before reuse.
+        # Each gunicorn thread keeps one, so gunicorn.conf.py caps the
+        # workers to DB_MAX_CONNECTIONS / GUNICORN_THREADS.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True,
+                                     cast=bool),
+    }
+}
+
+# With DB_POOL on, each process borrows connections from a psycopg pool
+# instead. Prefer it under ASGI, where a connection belongs to whichever
+# thread ran the query and persistent connections are seldom reused.
+# Django requires CONN_MAX_AGE = 0 with a pool.
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        },
+    }
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The cache must be shared by all worker processes: page invalidations,
+# login and vote throttles and cached sessions live in it (see
+# polls/checks.py). Files under CACHE_LOCATION are shared by the workers
+# of one host; point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached
+# to share it between hosts. Tests run in one process and use memory.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default=(
+            'django.core.cache.backends.locmem.LocMemCache' if TESTING
+            else 'django.core.cache.backends.filebased.FileBasedCache')),
+        'LOCATION': config('CACHE_LOCATION',
+                           default=str(BASE_DIR / 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000,
+                                  cast=int),
+        },
     }
 }
+# A test run is a single process, so its memory cache is shared enough.
+SILENCED_SYSTEM_CHECKS = ['polls.W001', 'polls.E002'] if TESTING else []
+
+# Password hashing
+# PASSWORD_HASHER picks the hasher for new and upgraded hashes: "pbkdf2"
+# (Django's default), "scrypt", or "argon2" (needs argon2-cffi). The
+# others stay listed so existing hashes still verify; they are re-hashed
+# with the chosen hasher and cost when their users log in. Costs left
+# empty use Django's defaults; see polls.hashers.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2',
+                         cast=Choices(['pbkdf2', 'scrypt', 'argon2']))
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'polls.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'polls.hashers.ScryptPasswordHasher',
+    'argon2': 'polls.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(path for name, path in PASSWORD_HASHER_CLASSES.items()
+      if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+
+def _optional_int(value):
+    return int(value) if value else None
+
+
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default='',
+                                    cast=_optional_int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR',
+                                     default='', cast=_optional_int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default='',
+                                   cast=_optional_int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST',
+                                     default='', cast=_optional_int)
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM',
+                                     default='', cast=_optional_int)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -155,6 +264,35 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# Log files go to POLLS_LOG_DIR unless LOG_FILE or AUDIT_LOG_FILE name
+# another path. "manage.py test" writes no log files; the tests that check
+# logging attach handlers of their own.
+LOG_DIR = Path(config('POLLS_LOG_DIR', default=str(BASE_DIR / 'logs')))
+if not TESTING:
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+# Every gunicorn worker would rotate the shared files on its own, renaming
+# them under the others and losing lines, so under gunicorn the files are
+# not rotated by default; rotate them externally (e.g. logrotate with
+# copytruncate) or give each process its own LOG_FILE.
+LOG_MAX_BYTES = config('LOG_MAX_BYTES', cast=int, default=(
+    0 if os.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn')
+    else 10 * 1024 * 1024))
+
+
+def _log_file_handler(filename, formatter):
+    """A background rotating file handler, or a null one under tests."""
+    if TESTING:
+        return {"class": "logging.NullHandler"}
+    return {
+        "()": "polls.log_handlers.background_rotating_file_handler",
+        "filename": filename,
+        "max_bytes": LOG_MAX_BYTES,
+        "backup_count": config('LOG_BACKUP_COUNT', default=5, cast=int),
+        "queue_size": config('LOG_QUEUE_SIZE', default=10000, cast=int),
+        "formatter": formatter,
+    }
+
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -163,17 +301,24 @@ LOGGING = {
             "format": "{name}  {message}",
             "style": "{",
         },
+        "json": {
+            "()": "polls.audit.JSONFormatter",
+        },
         "simple": {
             "format": "{levelname} {message}",
             "style": "{",
         },
     },
     "handlers": {
-        "file": {
-            "class": "logging.FileHandler",
-            "filename": "general.log",
-            "formatter": "verbose",
-        },
+        # Written by a background thread through a bounded queue, so
+        # requests never wait on the disk; see polls.log_handlers.
+        "file": _log_file_handler(
+            config('LOG_FILE', default=str(LOG_DIR / 'general.log')),
+            "verbose"),
+        # One JSON line per vote and authentication event; see polls.audit.
+        "audit": _log_file_handler(
+            config('AUDIT_LOG_FILE', default=str(LOG_DIR / 'audit.log')),
+            "json"),
         "console": {
             "level": "WARNING",
             "class": "logging.StreamHandler",
@@ -186,6 +331,63 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': True,
         },
+        'polls.audit': {
+            'handlers': ['audit'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
+
+# Polls
+# How votes on questions with vote_shards > 1 pick their counter shard:
+# "user" spreads voters by user id, "random" picks a shard per vote.
+POLLS_VOTE_SHARD_BY = config('POLLS_VOTE_SHARD_BY', default='user')
+# Number of questions listed per page of the polls index.
+POLLS_INDEX_PAGE_SIZE = config('POLLS_INDEX_PAGE_SIZE', default=20, cast=int)
+# Seconds the index and results pages are cached for anonymous visitors.
+# Results are invalidated by votes, so they can be kept longer; the index
+# shows open/closed status, which changes with the clock.
+POLLS_INDEX_CACHE_TIMEOUT = config('POLLS_INDEX_CACHE_TIMEOUT', default=60,
+                                   cast=int)
+POLLS_RESULTS_CACHE_TIMEOUT = config('POLLS_RESULTS_CACHE_TIMEOUT',
+                                     default=300, cast=int)
+# Path of a local SQLite journal to queue votes in. When set, the vote view
+# only appends to the journal and "manage.py process_vote_queue" writes the
+# votes to the database in batches. Empty writes votes synchronously.
+POLLS_VOTE_QUEUE = config('POLLS_VOTE_QUEUE', default='')
+# Route the polls pages to the async views in polls.async_views. Use this
+# when serving mysite.asgi with an ASGI server.
+POLLS_ASYNC_VIEWS = config('POLLS_ASYNC_VIEWS', default=False, cast=bool)
+# Seconds between reads of a question's tallies for the live results
+# stream, shared by all its viewers in a process, and between heartbeat
+# comments that keep an idle stream open through proxies.
+POLLS_RESULTS_STREAM_INTERVAL = config('POLLS_RESULTS_STREAM_INTERVAL',
+                                       default=1.0, cast=float)
+POLLS_RESULTS_STREAM_HEARTBEAT = config('POLLS_RESULTS_STREAM_HEARTBEAT',
+                                        default=15.0, cast=float)
+# Requests per view kept for the percentiles of the perf report at
+# /polls/perf/, and whether responses carry their timings in a
+# Server-Timing header. That shows every client the database time and
+# query count of its requests, so it is off unless DEBUG is on.
+POLLS_PERF_SAMPLES = config('POLLS_PERF_SAMPLES', default=1000, cast=int)
+POLLS_SERVER_TIMING = config('POLLS_SERVER_TIMING', default=DEBUG,
+                             cast=bool)
+# Flag a request when one line of code runs the same query more than
+# POLLS_NPLUSONE_THRESHOLD times: "warn" logs it, "raise" fails the
+# request, "off" does not check. The test suite runs with "raise".
+POLLS_NPLUSONE_MODE = config('POLLS_NPLUSONE_MODE', default='off',
+                             cast=Choices(['off', 'warn', 'raise']))
+POLLS_NPLUSONE_THRESHOLD = config('POLLS_NPLUSONE_THRESHOLD', default=5,
+                                  cast=int)
+# Login and vote rates per client IP and per account, as "N/S": bursts of
+# up to N requests, regaining N every S seconds. Empty turns a limit off.
+# The state is kept in the cache, so CACHE_BACKEND must be shared between
+# workers while a limit is on (check polls.E002).
+POLLS_THROTTLE_LOGIN = config('POLLS_THROTTLE_LOGIN', default='10/60')
+POLLS_THROTTLE_VOTE = config('POLLS_THROTTLE_VOTE', default='30/60')
+# Number of reverse proxies in front of the server whose X-Forwarded-For
+# entries are trusted to find the client IP. 0 uses the connection's
+# address and ignores the header, which clients can forge.
+POLLS_TRUSTED_PROXIES = config('POLLS_TRUSTED_PROXIES', default=0, cast=int)
@@ -15,6 +15,7 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path,include
 from django.views.generic import RedirectView
 from polls import views
@@ -27,3 +28,6 @@ urlpatterns = [
     path('signup/', views.signup, name = "signup")
 ]
 
+# Serves static files when DEBUG is on, as runserver does, also under
+# gunicorn.
+urlpatterns += staticfiles_urlpatterns()
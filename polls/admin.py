@@ -2,4 +2,9 @@ from django.contrib import admin
 from .models import Question, Choice
 # Register your models here.
 admin.site.register(Question)
-admin.site.register(Choice)
+
+
+@admin.register(Choice)
+class ChoiceAdmin(admin.ModelAdmin):
+    # the tally follows the votes; rebuild_vote_counts repairs it
+    readonly_fields = ["vote_count"]
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class PollsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "polls"
+
+    def ready(self):
+        # connect the cache invalidation receivers
+        from . import signals  # noqa: F401
+        # time the queries of every database connection, and watch them
+        # for N+1 patterns
+        from . import nplusone, perf  # noqa: F401
+        # register the system checks
+        from . import checks  # noqa: F401
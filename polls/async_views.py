@@ -0,0 +1,156 @@
+"""
+Async versions of the polls views, for serving under ASGI.
+
+They are routed instead of the views in polls.views when
+settings.POLLS_ASYNC_VIEWS is True. Database reads use the async ORM and
+templates are rendered by Django's handler after the view returns, so
+the views themselves never block the event loop. Writes still run in a
+worker thread because Django transactions are synchronous.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (HttpResponse, HttpResponseRedirect,
+                         StreamingHttpResponse)
+from django.shortcuts import aget_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from . import audit, streaming, views
+from .models import Choice, Question
+from .vote_queue import get_vote_queue
+
+
+class IndexView(views.IndexView):
+    """
+    Async version of polls.views.IndexView.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aget_cached(request, self.render_page)
+
+    async def render_page(self):
+        page = [question async for question in self.get_page_queryset()]
+        self.object_list = self.paginate(page)
+        return self.render_to_response(self.get_context_data())
+
+
+class DetailView(views.DetailView):
+    """
+    Async version of polls.views.DetailView.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        # resolve the user now so get_queryset() does not load it lazily
+        request.user = await request.auser()
+        try:
+            self.object = await self.get_queryset().aget(pk=kwargs["pk"])
+        except Question.DoesNotExist:
+            return self.reject_missing(request, kwargs["pk"])
+
+        rejection = self.reject_unavailable(request)
+        if rejection is not None:
+            return rejection
+
+        context = await sync_to_async(self.get_context_data)(
+            object=self.object)
+        return self.render_to_response(context)
+
+
+class ResultsView(views.ResultsView):
+    """
+    Async version of polls.views.ResultsView.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aget_cached(request, self.render_page)
+
+    async def render_page(self):
+        self.request.user = await self.request.auser()
+        self.object = await aget_object_or_404(self.get_queryset(),
+                                               pk=self.kwargs["pk"])
+        context = await sync_to_async(self.get_context_data)(
+            object=self.object)
+        return self.render_to_response(context)
+
+
+@login_required
+async def vote(request, question_id):
+    """
+    Async version of polls.views.vote.
+    """
+    this_user = await request.auser()
+    ip_address = views.get_client_ip(request)
+
+    choice_id = request.POST.get("choice", "")
+    selected_choice = None
+    if choice_id.isdigit():
+        selected_choice = await (
+            Choice.objects.select_related("question")
+            .filter(pk=choice_id, question_id=question_id)
+            .afirst()
+        )
+    if selected_choice is None:
+        question = await aget_object_or_404(Question, pk=question_id)
+    else:
+        question = selected_choice.question
+
+    # The question has ended already
+    if not question.can_vote():
+        messages.error(
+            request,
+            f"Poll number {question.id}  " f"is unavailable for voting.",
+        )
+        audit.vote_rejected(this_user.id, question.id, "closed", ip_address)
+        return HttpResponseRedirect(reverse("polls:index"))
+
+    if selected_choice is None:
+        messages.error(request, "You didn't select a choice.")
+        audit.vote_rejected(this_user.id, question.id, "no_choice",
+                            ip_address)
+        question = await Question.objects.prefetch_related(
+            "choice_set").aget(pk=question.pk)
+        return TemplateResponse(request, "polls/detail.html",
+                                {"question": question})
+
+    queue = get_vote_queue()
+    if queue is None:
+        await sync_to_async(views.vote_for_poll)(question, selected_choice,
+                                                 this_user)
+    else:
+        await sync_to_async(queue.put)(this_user.pk, question.id,
+                                       selected_choice.id)
+    messages.success(
+        request, f"Your vote for {selected_choice} " f"has been recorded."
+    )
+    audit.vote_cast(this_user.id, question.id, selected_choice.id,
+                    ip_address, queued=queue is not None)
+    return HttpResponseRedirect(reverse("polls:results", args=(question.id,)))
+
+
+async def results_stream(request, pk):
+    """
+    Stream the vote tallies of a question as Server-Sent Events.
+
+    Under ASGI the response stays open and sends each change of the
+    tallies. A WSGI worker cannot hold a stream open without blocking, and
+    having every open page poll here would cost queries per viewer, so
+    there it answers 204 No Content, which tells EventSource to stop
+    reconnecting. The results page only opens the stream under ASGI.
+
+    Args:
+        request (HttpRequest): The request.
+        pk (int): The id of the question.
+
+    Returns:
+        StreamingHttpResponse: A text/event-stream of `tallies` events.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    question = await aget_object_or_404(Question, pk=pk)
+    # the stream holds this request open; it must not hold a connection
+    await sync_to_async(streaming.release_connection)()
+    return StreamingHttpResponse(
+        streaming.stream_results(question.id),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,83 @@
+"""
+Structured audit events for votes and authentication.
+
+Each event is logged to the "polls.audit" logger with its name as the
+message and its fields as plain values, e.g.
+
+    audit.vote_cast(user.id, question.id, choice.id, ip)
+
+Nothing is formatted while the logger is disabled for the event's
+level. Otherwise JSONFormatter turns the record into one compact JSON
+line when a handler writes it, which for the background handler of
+polls.log_handlers is off the request path:
+
+    {"ts":"2024-09-01T10:00:00.123+00:00","level":"INFO",
+     "event":"vote_cast","user_id":3,"question_id":1,"choice_id":2,...}
+"""
+import json
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger("polls.audit")
+
+
+def _event(level, event, **fields):
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"audit": fields})
+
+
+def login(username, ip):
+    """A user logged in."""
+    _event(logging.INFO, "login", username=username, ip=ip)
+
+
+def login_failed(username, ip):
+    """Someone failed to log in as `username`."""
+    _event(logging.WARNING, "login_failed", username=username, ip=ip)
+
+
+def logout(username, ip):
+    """A user logged out."""
+    _event(logging.INFO, "logout", username=username, ip=ip)
+
+
+def vote_cast(user_id, question_id, choice_id, ip, queued=False):
+    """
+    A vote was recorded, or only queued for writing when `queued` is
+    True.
+    """
+    _event(logging.INFO, "vote_cast", user_id=user_id,
+           question_id=question_id, choice_id=choice_id, ip=ip,
+           queued=queued)
+
+
+def vote_rejected(user_id, question_id, reason, ip):
+    """
+    A vote was refused; `reason` is "closed" for a question not open for
+    voting or "no_choice" when no choice of the question was selected.
+    """
+    _event(logging.WARNING, "vote_rejected", user_id=user_id,
+           question_id=question_id, reason=reason, ip=ip)
+
+
+def throttled(view, ip, retry_after):
+    """A request to `view` was refused for exceeding its rate."""
+    _event(logging.WARNING, "throttled", view=view, ip=ip,
+           retry_after=retry_after)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format audit records as JSON lines: the time, level and event name,
+    followed by the event's fields.
+    """
+
+    def format(self, record):
+        line = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc)
+                          .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "event": record.getMessage(),
+            **getattr(record, "audit", {}),
+        }
+        return json.dumps(line, separators=(",", ":"), default=str)
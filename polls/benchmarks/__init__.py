@@ -0,0 +1,19 @@
+"""
+Benchmarks of the polls workflow.
+
+seed creates a data set of a chosen size from the fixtures in data/,
+and load replays the index -> detail -> vote -> results flow against
+it with concurrent workers. The bench_polls management command runs
+both and prints a JSON report to compare versions by.
+"""
+from django.test import override_settings
+
+
+def unthrottled():
+    """
+    Returns:
+        override_settings: Turns login and vote throttling off, for
+            benchmarks that log in and vote far faster than people do.
+    """
+    return override_settings(POLLS_THROTTLE_LOGIN="",
+                             POLLS_THROTTLE_VOTE="")
@@ -0,0 +1,188 @@
+"""
+Drive the polls workflow with concurrent workers and summarize it.
+
+Each worker repeats a flow as one seeded user: open the index, open a
+random seeded question, vote for a random choice and open the results.
+Requests go through the Django test client, or over HTTP to a running
+server when a base URL is given. Query counts are read from the
+Server-Timing header of polls.middleware.PerformanceMiddleware.
+"""
+import random
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import (HTTPCookieProcessor, HTTPRedirectHandler,
+                            Request, build_opener)
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from polls.perf import percentile
+
+#: The steps of a flow and the status each should answer with.
+STEPS = {"index": 200, "detail": 200, "vote": 302, "results": 200}
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class ClientSession:
+    """Requests through the Django test client as a logged in user."""
+
+    def __init__(self, user):
+        self.client = Client(raise_request_exception=False)
+        self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        """
+        Returns:
+            tuple: (status code, Server-Timing header or None).
+        """
+        if method == "POST":
+            response = self.client.post(path, data)
+        else:
+            response = self.client.get(path)
+        return response.status_code, response.headers.get("Server-Timing")
+
+
+class _NoRedirect(HTTPRedirectHandler):
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPSession:
+    """Requests to a running server, logged in with a password."""
+
+    def __init__(self, base_url, username, password):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies),
+                                   _NoRedirect)
+        login = reverse("login")
+        self.request("GET", login)
+        self.request("POST", login, {"username": username,
+                                     "password": password})
+
+    def request(self, method, path, data=None):
+        """
+        Returns:
+            tuple: (status code, Server-Timing header or None).
+        """
+        body = None
+        if method == "POST":
+            token = next((c.value for c in self.cookies
+                          if c.name == "csrftoken"), "")
+            body = urlencode(dict(data, csrfmiddlewaretoken=token)).encode()
+        request = Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status, response.headers["Server-Timing"]
+        except HTTPError as error:
+            error.read()
+            return error.code, error.headers["Server-Timing"]
+
+
+def run(sessions, polls, flows):
+    """
+    Run `flows` flows spread over the sessions, one worker per session.
+
+    Args:
+        sessions (list): Zero-argument callables each creating the
+            session of one worker, in that worker's thread.
+        polls (dict): The choice ids of each question to vote on.
+        flows (int): How many flows to run in total.
+
+    Returns:
+        tuple: (elapsed seconds, list of (step, status, latency in
+            seconds, query count or None) samples).
+    """
+    remaining = iter(range(flows))
+    lock = threading.Lock()
+    question_ids = list(polls)
+
+    def worker(make_session):
+        samples = []
+        session = make_session()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return samples
+            question_id = random.choice(question_ids)
+            steps = [
+                ("index", "GET", reverse("polls:index"), None),
+                ("detail", "GET",
+                 reverse("polls:detail", args=(question_id,)), None),
+                ("vote", "POST",
+                 reverse("polls:vote", args=(question_id,)),
+                 {"choice": random.choice(polls[question_id])}),
+                ("results", "GET",
+                 reverse("polls:results", args=(question_id,)), None),
+            ]
+            for step, method, path, data in steps:
+                start = time.perf_counter()
+                status, timing = session.request(method, path, data)
+                latency = time.perf_counter() - start
+                queries = _QUERIES.search(timing or "")
+                samples.append((step, status, latency,
+                                int(queries[1]) if queries else None))
+
+    def thread_worker(make_session):
+        try:
+            return worker(make_session)
+        finally:
+            connections.close_all()
+
+    began = time.perf_counter()
+    if len(sessions) == 1:
+        samples = worker(sessions[0])
+    else:
+        with ThreadPoolExecutor(len(sessions)) as pool:
+            samples = [sample for worker_samples in
+                       pool.map(thread_worker, sessions)
+                       for sample in worker_samples]
+    return time.perf_counter() - began, samples
+
+
+def summarize(samples):
+    """
+    Returns:
+        dict: The request and error counts, latency percentiles in
+            milliseconds and queries per request of a list of samples.
+    """
+    latencies = sorted(latency * 1000 for _, _, latency, _ in samples)
+    queries = sorted(q for _, _, _, q in samples if q is not None)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for step, status, _, _ in samples
+                      if status != STEPS[step]),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2),
+            **{f"p{p}": round(percentile(latencies, p), 2)
+               for p in (50, 95, 99)},
+        } if latencies else None,
+        "queries_per_request": {
+            "mean": round(statistics.fmean(queries), 2),
+            "max": queries[-1],
+        } if queries else None,
+    }
+
+
+def report(elapsed, samples, flows):
+    """
+    Returns:
+        dict: Throughput over the whole run, and a summary of all
+            requests and of each step.
+    """
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(samples) / elapsed, 1),
+        "flows_per_s": round(flows / elapsed, 1),
+        "all": summarize(samples),
+        "steps": {step: summarize([s for s in samples if s[0] == step])
+                  for step in STEPS},
+    }
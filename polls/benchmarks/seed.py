@@ -0,0 +1,128 @@
+"""
+Seed and remove benchmark data.
+
+Questions are named after the fixture questions in data/polls-v4.json,
+prefixed with BENCH_PREFIX, and get the fixture choices of the question
+they copy. Users are named "bench-user-N" and share BENCH_PASSWORD so
+that load runs over HTTP can log in as them.
+"""
+import json
+import random
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from polls import tally
+from polls.models import Choice, Question, Vote
+
+BENCH_PREFIX = "[bench] "
+BENCH_USER_PREFIX = "bench-user-"
+BENCH_PASSWORD = "bench-password"
+
+#: The fixture the seeded questions and choices are copied from.
+FIXTURE = settings.BASE_DIR / "data" / "polls-v4.json"
+
+
+def fixture_polls():
+    """
+    Returns:
+        list: (question text, list of choice texts) of each fixture
+            question that has choices.
+    """
+    with open(FIXTURE) as file:
+        objects = json.load(file)
+    texts = {obj["pk"]: obj["fields"]["question_text"]
+             for obj in objects if obj["model"] == "polls.question"}
+    choices = {}
+    for obj in objects:
+        if obj["model"] == "polls.choice":
+            choices.setdefault(obj["fields"]["question"], []).append(
+                obj["fields"]["choice_text"])
+    return [(texts[pk], choices[pk]) for pk in sorted(choices)]
+
+
+def bench_questions():
+    """Returns the seeded questions."""
+    return Question.objects.filter(question_text__startswith=BENCH_PREFIX)
+
+
+def bench_users():
+    """Returns the seeded users."""
+    return User.objects.filter(username__startswith=BENCH_USER_PREFIX)
+
+
+def seed(questions, choices, users, votes, batch_size=5000):
+    """
+    Create a benchmark data set.
+
+    Args:
+        questions (int): Questions to create, published a minute apart.
+        choices (int): Choices per question; fixture choices are reused
+            and numbered when a fixture question has fewer.
+        users (int): Users to create.
+        votes (int): Votes to cast, at most one per user and question,
+            filling the newest questions first.
+        batch_size (int): Rows per INSERT.
+
+    Returns:
+        list: The ids of the seeded questions.
+    """
+    votes = min(votes, questions * users)
+    polls = fixture_polls()
+    now = timezone.now()
+    with transaction.atomic():
+        created = Question.objects.bulk_create(
+            [Question(question_text=f"{BENCH_PREFIX}{n} "
+                                    f"{polls[n % len(polls)][0]}",
+                      pub_date=now - timezone.timedelta(minutes=n))
+             for n in range(questions)],
+            batch_size=batch_size,
+        )
+        question_ids = [question.pk for question in created]
+        created = Choice.objects.bulk_create(
+            [Choice(question_id=question_id,
+                    choice_text=choice_text(polls[n % len(polls)][1], c))
+             for n, question_id in enumerate(question_ids)
+             for c in range(choices)],
+            batch_size=batch_size,
+        )
+        choice_ids = {}
+        for choice in created:
+            choice_ids.setdefault(choice.question_id, []).append(choice.pk)
+        # hash once; every user gets the same hash
+        password = make_password(BENCH_PASSWORD)
+        start = bench_users().count()
+        created = User.objects.bulk_create(
+            [User(username=f"{BENCH_USER_PREFIX}{n}", password=password)
+             for n in range(start, start + users)],
+            batch_size=batch_size,
+        )
+        user_ids = [user.pk for user in created]
+        pending = []
+        for n in range(votes):
+            question_id = question_ids[n // users]
+            pending.append(Vote(user_id=user_ids[n % users],
+                                question_id=question_id,
+                                choice_id=random.choice(
+                                    choice_ids[question_id])))
+            if len(pending) >= batch_size:
+                Vote.objects.bulk_create(pending)
+                pending = []
+        Vote.objects.bulk_create(pending)
+        tally.rebuild(question_ids)
+    return question_ids
+
+
+def choice_text(texts, n):
+    """Returns the n-th choice text, numbering reused fixture texts."""
+    text = texts[n % len(texts)]
+    return text if n < len(texts) else f"{text} ({n // len(texts) + 1})"
+
+
+def cleanup():
+    """Delete the seeded questions, with their choices and votes, and
+    the seeded users.
+    """
+    bench_questions().delete()
+    bench_users().delete()
@@ -0,0 +1,71 @@
+"""
+System checks for settings the polls app relies on.
+
+Several features keep state in the default cache that every worker
+process must see. A per-process cache silently weakens them, so these
+checks report it when "manage.py" commands start, migrate included.
+"""
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+#: Session engines that keep sessions in the cache.
+CACHED_SESSION_ENGINES = {
+    "django.contrib.sessions.backends.cache",
+    "django.contrib.sessions.backends.cached_db",
+}
+
+#: Cache backends whose entries are only seen by the process that made them.
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def cache_is_process_local():
+    """Returns True if the default cache is not shared between processes."""
+    return settings.CACHES["default"]["BACKEND"] in PROCESS_LOCAL_CACHES
+
+
+@register()
+def check_page_cache(app_configs, **kwargs):
+    """Cached pages are invalidated in the cache of the voting process."""
+    if not cache_is_process_local():
+        return []
+    return [Warning(
+        "The default cache is not shared between processes, so a vote "
+        "only invalidates the cached pages of the worker that took it.",
+        hint="Use a shared cache, e.g. FileBasedCache or Redis, when "
+             "serving with several workers.",
+        id="polls.W001",
+    )]
+
+
+@register()
+def check_session_cache(app_configs, **kwargs):
+    """Sessions read from a per-process cache outlive their logout."""
+    if (settings.SESSION_ENGINE not in CACHED_SESSION_ENGINES
+            or not cache_is_process_local()):
+        return []
+    return [Error(
+        "Sessions are kept in a cache that is not shared between "
+        "processes, so a session ended in one worker stays valid in the "
+        "others.",
+        hint="Set SESSION_STORE to db or signed_cookies, or use a shared "
+             "CACHE_BACKEND.",
+        id="polls.E001",
+    )]
+
+
+@register()
+def check_throttle_cache(app_configs, **kwargs):
+    """Throttle buckets in a per-process cache multiply the limits."""
+    throttled = settings.POLLS_THROTTLE_LOGIN or settings.POLLS_THROTTLE_VOTE
+    if not throttled or not cache_is_process_local():
+        return []
+    return [Error(
+        "Login and vote throttling keep their state in a cache that is not "
+        "shared between processes, so each worker allows the full rate.",
+        hint="Use a shared CACHE_BACKEND, or turn the limits off with empty "
+             "POLLS_THROTTLE_LOGIN and POLLS_THROTTLE_VOTE.",
+        id="polls.E002",
+    )]
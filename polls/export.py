@@ -0,0 +1,118 @@
+"""
+Stream the results and raw votes of a question as CSV or NDJSON.
+
+Rows are read with QuerySet.iterator(), which uses a server-side cursor
+on PostgreSQL, and only the exported columns are selected, so a poll with
+millions of votes is exported in constant memory:
+
+    chunks = export.render(export.VOTE_FIELDS,
+                           export.vote_rows(question_id), "ndjson")
+
+render() yields the output CHUNK_SIZE rows at a time. Under ASGI
+streaming_response() feeds the chunks to the server from a worker thread
+one at a time, since Django would otherwise read a synchronous iterator
+to the end before sending anything.
+"""
+import csv
+import io
+import json
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from . import tally
+from .models import Choice, Vote
+
+#: Export formats and their content types.
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+#: Rows fetched from the database, and written out, at a time.
+CHUNK_SIZE = 2000
+
+RESULT_FIELDS = ("question_id", "choice_id", "choice_text", "votes")
+VOTE_FIELDS = ("vote_id", "question_id", "choice_id", "user_id")
+
+
+def result_rows(question_id):
+    """Yields the RESULT_FIELDS of each choice of the question."""
+    choices = tally.with_totals(
+        Choice.objects.filter(question_id=question_id).order_by("pk")
+    ).values_list("pk", "choice_text", "vote_count", "shard_votes")
+    for pk, text, vote_count, shard_votes in choices.iterator(CHUNK_SIZE):
+        yield question_id, pk, text, vote_count + shard_votes
+
+
+def vote_rows(question_id, chunk_size=CHUNK_SIZE):
+    """Yields the VOTE_FIELDS of each vote on the question."""
+    return (
+        Vote.objects.filter(question_id=question_id).order_by("pk")
+        .values_list("pk", "question_id", "choice_id", "user_id")
+        .iterator(chunk_size)
+    )
+
+
+def _csv_lines(fields, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(fields, batches):
+    for batch in batches:
+        yield "".join(json.dumps(dict(zip(fields, row)),
+                                 ensure_ascii=False) + "\n"
+                      for row in batch)
+
+
+def render(fields, rows, fmt, chunk_size=CHUNK_SIZE):
+    """
+    Encode rows as CSV, with a header line, or as NDJSON objects.
+
+    Args:
+        fields (tuple): The column names.
+        rows (iterable): Tuples of values in the order of `fields`.
+        fmt (str): One of FORMATS.
+        chunk_size (int): How many rows each yielded chunk holds.
+
+    Yields:
+        str: The encoded output, a chunk at a time.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    rows = iter(rows)
+    batches = iter(lambda: list(islice(rows, chunk_size)), [])
+    lines = _csv_lines if fmt == "csv" else _ndjson_lines
+    for chunk in lines(fields, batches):
+        if chunk:
+            yield chunk
+
+
+async def _aiter(chunks):
+    # thread sensitive, so the cursor stays on the request's connection
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
+
+
+def streaming_response(request, chunks, fmt, filename):
+    """
+    Returns:
+        StreamingHttpResponse: The chunks as a download named
+            `filename`.`fmt`, streamed under WSGI and ASGI alike.
+    """
+    if isinstance(request, ASGIRequest):
+        chunks = _aiter(chunks)
+    response = StreamingHttpResponse(
+        chunks, content_type=f"{FORMATS[fmt]}; charset=utf-8"
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{fmt}"'
+    )
+    response["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,60 @@
+"""
+Password hashers whose cost is set in settings.
+
+They keep the algorithm names of Django's hashers, so existing hashes
+still verify. When a user logs in with a hash made by another hasher,
+or with other cost parameters, Django re-hashes the password with the
+first hasher of settings.PASSWORD_HASHERS, so changing the profile or
+the cost upgrades stored hashes as users log in.
+
+Each cost setting falls back to Django's default when it is None:
+
+    PASSWORD_PBKDF2_ITERATIONS
+    PASSWORD_ARGON2_TIME_COST, PASSWORD_ARGON2_MEMORY_COST (KiB),
+    PASSWORD_ARGON2_PARALLELISM
+    PASSWORD_SCRYPT_WORK_FACTOR
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _cost(name, default):
+    value = getattr(settings, name, None)
+    return default if value is None else value
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with settings.PASSWORD_PBKDF2_ITERATIONS rounds."""
+
+    @property
+    def iterations(self):
+        return _cost("PASSWORD_PBKDF2_ITERATIONS",
+                     hashers.PBKDF2PasswordHasher.iterations)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with the PASSWORD_ARGON2_* costs; needs argon2-cffi."""
+
+    @property
+    def time_cost(self):
+        return _cost("PASSWORD_ARGON2_TIME_COST",
+                     hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return _cost("PASSWORD_ARGON2_MEMORY_COST",
+                     hashers.Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return _cost("PASSWORD_ARGON2_PARALLELISM",
+                     hashers.Argon2PasswordHasher.parallelism)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """scrypt with settings.PASSWORD_SCRYPT_WORK_FACTOR as N."""
+
+    @property
+    def work_factor(self):
+        return _cost("PASSWORD_SCRYPT_WORK_FACTOR",
+                     hashers.ScryptPasswordHasher.work_factor)
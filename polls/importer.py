@@ -0,0 +1,274 @@
+"""
+Import the JSON fixtures of data/ in bounded memory.
+
+The fixtures are JSON arrays in Django's serialization format. loaddata
+parses a whole file before saving its objects one by one; here the array
+is decoded one object at a time, each record is upgraded to the current
+schema, and the objects are written with bulk_create() in batches:
+
+    importer = Importer(batch_size=5000)
+    importer.load(path)
+    counts = importer.finish()
+
+Records of every fixture version are accepted:
+
+    v1  choices point at their question with "question_text" and carry a
+        "vote" counter; questions have no "end_date".
+    v2  choices point at "question" and still carry "vote".
+    v3, v4  votes have no "question"; it is taken from their choice.
+    v5  the current schema.
+
+The "vote" counters of v1 and v2 are dropped, as migration 0010 dropped
+them: they say nothing about who voted. The tallies are rebuilt from the
+Vote rows once the import is done.
+
+Objects are upserted: users, questions and choices by primary key, as
+loaddata does, and votes by user and question, keeping the last vote of
+a user on a question as migration 0013 does. Importing a file twice is
+therefore harmless.
+"""
+import json
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.core.serializers import python
+from django.db import connection, transaction
+from polls import page_cache, tally
+from polls.models import Choice, Question, Vote
+
+#: The models a fixture may contain, in the order batches write them.
+MODELS = (User, Question, Choice, Vote)
+
+_LABELS = {model._meta.label_lower: model for model in MODELS}
+_SEPARATORS = " \t\r\n,"
+
+
+class _Reader:
+    """A window over a text file, refilled as decoding moves through it."""
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+
+    def _fill(self):
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            raise ValueError("The fixture ends in the middle of its array")
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def peek(self):
+        """Returns the next character that is not a separator."""
+        while True:
+            while (self.position < len(self.buffer)
+                   and self.buffer[self.position] in _SEPARATORS):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            self._fill()
+
+    def unexpected(self):
+        found = self.buffer[self.position:self.position + 20]
+        return ValueError(f"Expected a JSON array of objects, found "
+                          f"{found!r}")
+
+    def decode(self):
+        """Decode the object starting at the current position."""
+        while True:
+            try:
+                obj, self.position = self.decoder.raw_decode(self.buffer,
+                                                             self.position)
+                return obj
+            except json.JSONDecodeError as error:
+                # an object is only complete at its closing brace, so
+                # before the end of the file this means: read on
+                try:
+                    self._fill()
+                except ValueError:
+                    raise ValueError(f"Invalid fixture: {error}") from None
+
+
+def iter_objects(file, chunk_size=64 * 1024):
+    """
+    Decode the objects of a JSON array one at a time.
+
+    Only one chunk of the file, or one object if it is larger, is held in
+    memory at a time.
+
+    Args:
+        file: A text file holding a JSON array of objects.
+        chunk_size (int): How many characters to read at a time.
+
+    Yields:
+        dict: Each object of the array.
+
+    Raises:
+        ValueError: The file is not a JSON array of objects.
+    """
+    reader = _Reader(file, chunk_size)
+    if reader.peek() != "[":
+        raise reader.unexpected()
+    reader.position += 1
+    while (char := reader.peek()) != "]":
+        if char != "{":
+            raise reader.unexpected()
+        yield reader.decode()
+
+
+def _upgrade_choice(record):
+    fields = record["fields"]
+    if "question_text" in fields:
+        fields["question"] = fields.pop("question_text")
+    fields.pop("vote", None)
+
+
+def _upgrade_vote(record):
+    # votes are matched on user and question, not their old ids
+    record.pop("pk", None)
+
+
+_UPGRADES = {"polls.choice": _upgrade_choice, "polls.vote": _upgrade_vote}
+
+
+def upgrade(record):
+    """
+    Bring a fixture record of any version to the current schema.
+
+    Returns:
+        dict: The record, with its fields renamed or dropped in place.
+
+    Raises:
+        ValueError: The record is not of a model that can be imported.
+    """
+    label = record.get("model", "").lower()
+    if label not in _LABELS:
+        raise ValueError(f"Cannot import {record.get('model')!r} records")
+    record["model"] = label
+    record.setdefault("fields", {})
+    if label in _UPGRADES:
+        _UPGRADES[label](record)
+    return record
+
+
+class Importer:
+    """
+    Write upgraded fixture objects in batches.
+
+    Each batch is written in a transaction of its own, unless the caller
+    has one open. Committing batch by batch keeps transactions short, but
+    then every object must come after the objects it refers to, e.g. the
+    users and polls before the votes; in one transaction around the whole
+    import, as loaddata uses, references are only checked at the end.
+
+    Args:
+        batch_size (int): How many objects to write per batch; a batch
+            may hold objects of several models.
+    """
+
+    def __init__(self, batch_size=5000):
+        self.batch_size = batch_size
+        self.pending = {model: [] for model in MODELS}
+        self.size = 0
+        self.counts = {model._meta.label_lower: 0 for model in MODELS}
+        self.question_ids = set()
+        # choice id -> question id, for votes of fixtures before v5
+        self.choice_questions = {}
+
+    def load(self, path, chunk_size=64 * 1024):
+        """Read and write all the objects of a fixture file."""
+        with open(path, encoding="utf-8") as file:
+            records = (upgrade(r) for r in iter_objects(file, chunk_size))
+            for deserialized in python.Deserializer(records):
+                self.add(deserialized)
+
+    def add(self, deserialized):
+        """Queue a deserialized object, writing a batch when it is full."""
+        self.pending[type(deserialized.object)].append(deserialized)
+        self.size += 1
+        if self.size >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the queued objects, the models they refer to first."""
+        if not self.size:
+            return
+        with transaction.atomic(savepoint=False):
+            for model in MODELS:
+                objects = self.pending[model]
+                if objects:
+                    write = self._write_votes if model is Vote else self._write
+                    write(model, objects)
+                self.counts[model._meta.label_lower] += len(objects)
+                objects.clear()
+        self.size = 0
+
+    def _write(self, model, deserialized):
+        fields = [field.name for field in model._meta.concrete_fields
+                  if not field.primary_key]
+        model.objects.bulk_create(
+            [d.object for d in deserialized],
+            update_conflicts=True,
+            unique_fields=[model._meta.pk.name],
+            update_fields=fields,
+        )
+        for d in deserialized:
+            for name, values in (d.m2m_data or {}).items():
+                if values:
+                    getattr(d.object, name).set(values)
+        if model is Choice:
+            for d in deserialized:
+                self.choice_questions[d.object.pk] = d.object.question_id
+                self.question_ids.add(d.object.question_id)
+
+    def _write_votes(self, model, deserialized):
+        votes = [d.object for d in deserialized]
+        unknown = {vote.choice_id for vote in votes
+                   if vote.question_id is None
+                   and vote.choice_id not in self.choice_questions}
+        if unknown:
+            self.choice_questions.update(
+                Choice.objects.filter(pk__in=unknown)
+                .values_list("pk", "question_id")
+            )
+        latest = {}
+        for vote in votes:
+            if vote.question_id is None:
+                if vote.choice_id not in self.choice_questions:
+                    raise ValueError(
+                        f"Vote for unknown choice {vote.choice_id}; import "
+                        f"the polls before their votes")
+                vote.question_id = self.choice_questions[vote.choice_id]
+            # one row per user and question; a later vote replaces it
+            latest[vote.user_id, vote.question_id] = vote
+            self.question_ids.add(vote.question_id)
+        Vote.objects.bulk_create(
+            latest.values(),
+            update_conflicts=True,
+            unique_fields=["user", "question"],
+            update_fields=["choice"],
+        )
+
+    def finish(self):
+        """
+        Write what is left, then bring the database up to date with the
+        import: reset the primary key sequences past the imported ids,
+        rebuild the tallies of the affected questions and invalidate the
+        cached pages.
+
+        Returns:
+            dict: How many objects of each model were read.
+        """
+        self.flush()
+        with transaction.atomic(savepoint=False):
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(),
+                                                             MODELS):
+                    cursor.execute(sql)
+            if self.question_ids:
+                tally.rebuild(self.question_ids)
+                for question_id in self.question_ids:
+                    page_cache.bump_results(question_id)
+            page_cache.bump_index()
+        return dict(self.counts)
@@ -0,0 +1,132 @@
+"""
+Logging handlers that keep log I/O out of the request path.
+
+BackgroundHandler puts records on a bounded in-memory queue, and a
+QueueListener thread writes them to the real handlers. A request only
+pays for merging the message arguments; formatting the line and writing
+it to disk happen in the background. When the writer falls behind and
+the queue is full, new records are dropped rather than making requests
+wait. The number dropped is logged once there is room again.
+"""
+import atexit
+import copy
+import logging
+import os
+import queue
+import weakref
+from logging.handlers import (QueueHandler, QueueListener,
+                              RotatingFileHandler)
+
+# the handlers that are not closed yet, whose writer threads have to be
+# restarted in a forked worker process and stopped at exit
+_open_handlers = weakref.WeakSet()
+
+
+def _restart_after_fork():
+    # a forked process does not inherit the writer threads
+    for handler in list(_open_handlers):
+        handler._start()
+
+
+def _close_at_exit():
+    for handler in list(_open_handlers):
+        handler.close()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(_close_at_exit)
+
+
+class _Listener(QueueListener):
+
+    def enqueue_sentinel(self):
+        # wait for room rather than fail to stop on a full queue
+        self.queue.put(self._sentinel)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Hand records to a background thread that emits them to `handlers`.
+
+    The formatter set on this handler is used by the target handlers, so
+    it can be configured in LOGGING as for any other handler.
+
+    Args:
+        handlers: The handlers that write the records.
+        queue_size (int): How many records may wait to be written before
+            new ones are dropped.
+    """
+
+    def __init__(self, *handlers, queue_size=10000):
+        self.targets = handlers
+        self.queue_size = queue_size
+        self.dropped = 0
+        super().__init__(None)
+        self._start()
+        _open_handlers.add(self)
+
+    def _start(self):
+        self.queue = queue.Queue(self.queue_size)
+        self.listener = _Listener(self.queue, *self.targets,
+                                  respect_handler_level=True)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        for handler in self.targets:
+            handler.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        Merge the message arguments now, as they may change or need the
+        database once the request is over, and leave formatting to the
+        writer thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # the traceback would keep the request's frames alive
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": record.name,
+                    "levelno": logging.WARNING,
+                    "levelname": logging.getLevelName(logging.WARNING),
+                    "msg": f"{self.dropped} log records dropped: "
+                           f"the log queue was full",
+                }))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Write the queued records and stop the writer thread."""
+        _open_handlers.discard(self)
+        if self.listener._thread is not None:
+            self.listener.stop()
+        for handler in self.targets:
+            handler.close()
+        super().close()
+
+
+def background_rotating_file_handler(filename, max_bytes=10 * 1024 * 1024,
+                                     backup_count=5, queue_size=10000):
+    """
+    Returns:
+        BackgroundHandler: A handler writing to `filename` in the
+            background, rolling it over to `backup_count` numbered
+            backups when it reaches `max_bytes`.
+    """
+    return BackgroundHandler(
+        RotatingFileHandler(filename, maxBytes=max_bytes,
+                            backupCount=backup_count, delay=True),
+        queue_size=queue_size,
+    )
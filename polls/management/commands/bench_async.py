@@ -0,0 +1,134 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def fetch(host, port, path):
+    """
+    Send one GET request over a fresh connection.
+
+    Returns:
+        int: The HTTP status code of the response.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+                 f"Connection: close\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+async def run_load(base_url, paths, requests, concurrency):
+    """
+    Issue `requests` GETs spread over `paths` from `concurrency` clients.
+
+    Returns:
+        tuple: (elapsed seconds, list of latencies in ms, error count).
+    """
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    latencies = []
+    errors = 0
+    issued = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for n in issued:
+            start = time.perf_counter()
+            try:
+                status = await fetch(host, port, paths[n % len(paths)])
+            except OSError:
+                status = None
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status is None or status >= 400:
+                errors += 1
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - began, latencies, errors
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    """
+    Compare the throughput of the sync and async polls views served by
+    an ASGI server.
+
+    By default it starts uvicorn twice on mysite.asgi, once with
+    POLLS_ASYNC_VIEWS off and once on, and loads each with concurrent
+    clients. With --url it only loads an already running server.
+    """
+
+    help = "Benchmark sync against async polls views under ASGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url",
+                            help="Load this running server instead.")
+        parser.add_argument("--path", action="append", dest="paths",
+                            help="Path to request; may be repeated. "
+                                 "Defaults to /polls/.")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or ["/polls/"]
+        if options["url"]:
+            self.load("server", options["url"], paths, options)
+            return
+        for async_views in (False, True):
+            port = free_port()
+            server = self.start_server(port, async_views)
+            try:
+                self.load("async views" if async_views else "sync views",
+                          f"http://127.0.0.1:{port}", paths, options)
+            finally:
+                server.terminate()
+                server.wait()
+
+    def start_server(self, port, async_views):
+        env = dict(os.environ, POLLS_ASYNC_VIEWS=str(async_views))
+        try:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "mysite.asgi:application",
+                 "--port", str(port), "--log-level", "warning"],
+                env=env,
+            )
+        except OSError as error:
+            raise CommandError(f"Cannot start uvicorn: {error}")
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("uvicorn exited; is it installed? "
+                                   "Use --url to load a running server.")
+            try:
+                socket.create_connection(("127.0.0.1", port), 1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError("uvicorn did not start in time.")
+
+    def load(self, label, url, paths, options):
+        elapsed, latencies, errors = asyncio.run(
+            run_load(url, paths, options["requests"], options["concurrency"])
+        )
+        cuts = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{label}: {len(latencies) / elapsed:.0f} req/s, "
+            f"p50 {cuts[49]:.1f} ms, p95 {cuts[94]:.1f} ms, "
+            f"p99 {cuts[98]:.1f} ms, errors {errors}"
+        )
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from polls.models import Question
+from .bench_async import free_port, run_load
+
+#: Environment of the server for each connection mode.
+MODES = {
+    "new connection per request": {"DB_CONN_MAX_AGE": "0",
+                                   "DB_POOL": "False"},
+    "persistent connections": {"DB_CONN_MAX_AGE": "60", "DB_POOL": "False"},
+    "psycopg pool": {"DB_POOL": "True"},
+}
+
+
+class Command(BaseCommand):
+    """
+    Compare request latency with and without database connection reuse.
+
+    Starts gunicorn once per mode of MODES, configured through the DB_*
+    settings, and loads each with concurrent clients over HTTP. The test
+    client cannot be used here, as it keeps the connection open between
+    requests whatever the settings say.
+    """
+
+    help = "Benchmark per-request latency with connection reuse on and off."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", action="append", dest="paths",
+                            help="Path to request; may be repeated. "
+                                 "Defaults to the newest poll's detail "
+                                 "page, which is never cached.")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--workers", type=int, default=2,
+                            help="gunicorn worker processes.")
+        parser.add_argument("--mode", action="append", dest="modes",
+                            choices=sorted(MODES),
+                            help="Mode to run; may be repeated. "
+                                 "Defaults to all.")
+
+    def handle(self, *args, **options):
+        paths = options["paths"]
+        if not paths:
+            question = Question.objects.published().order_by("-pk").first()
+            if question is None:
+                raise CommandError("No published poll; pass --path.")
+            paths = [reverse("polls:detail", args=(question.pk,))]
+        for mode in options["modes"] or MODES:
+            port = free_port()
+            server = self.start_server(port, MODES[mode], options["workers"])
+            try:
+                elapsed, latencies, errors = asyncio.run(run_load(
+                    f"http://127.0.0.1:{port}", paths, options["requests"],
+                    options["concurrency"]))
+            finally:
+                server.terminate()
+                server.wait()
+            cuts = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"{mode}: {len(latencies) / elapsed:.0f} req/s, "
+                f"p50 {cuts[49]:.1f} ms, p95 {cuts[94]:.1f} ms, "
+                f"p99 {cuts[98]:.1f} ms, errors {errors}"
+            )
+
+    def start_server(self, port, mode_env, workers):
+        env = dict(os.environ, **mode_env, BIND=f"127.0.0.1:{port}",
+                   WEB_CONCURRENCY=str(workers))
+        env.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
+        try:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "--config",
+                 str(settings.BASE_DIR / "gunicorn.conf.py"),
+                 "--log-level", "warning"],
+                env=env, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL,
+            )
+        except OSError as error:
+            raise CommandError(f"Cannot start gunicorn: {error}")
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited; is it installed, and "
+                                   "is the database reachable?")
+            try:
+                socket.create_connection(("127.0.0.1", port), 1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError("gunicorn did not start in time.")
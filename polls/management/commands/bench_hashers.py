@@ -0,0 +1,75 @@
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+from polls.benchmarks import unthrottled
+
+USER_PREFIX = "bench-signup-"
+PASSWORD = "Bench-Passw0rd!"
+
+
+class Command(BaseCommand):
+    """
+    Report signups and logins per second per core for each password
+    hasher profile of settings.PASSWORD_HASHER_CLASSES, with the cost
+    settings currently configured.
+
+    Requests go through the signup and login views with the Django test
+    client in a single thread, so each rate is what one core sustains.
+    Profiles whose library is not installed are skipped.
+    """
+
+    help = "Benchmark signup and login throughput per password hasher."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--profile", action="append", dest="profiles",
+                            choices=sorted(settings.PASSWORD_HASHER_CLASSES),
+                            help="Profile to run; may be repeated. "
+                                 "Defaults to all.")
+
+    @unthrottled()
+    def handle(self, *args, **options):
+        for profile in (options["profiles"]
+                        or settings.PASSWORD_HASHER_CLASSES):
+            hashers = [settings.PASSWORD_HASHER_CLASSES[profile],
+                       *settings.PASSWORD_HASHERS]
+            with override_settings(PASSWORD_HASHERS=hashers):
+                try:
+                    signups, logins = self.run(options["users"])
+                except ValueError as error:
+                    # the hasher's library is missing
+                    self.stdout.write(f"{profile}: skipped ({error})")
+                    continue
+                finally:
+                    User.objects.filter(
+                        username__startswith=USER_PREFIX).delete()
+            self.stdout.write(f"{profile}: {signups:.1f} signups/s, "
+                              f"{logins:.1f} logins/s per core")
+
+    def run(self, users):
+        """
+        Returns:
+            tuple: (signups per second, logins per second).
+        """
+        client = Client()
+        start = time.perf_counter()
+        for n in range(users):
+            response = client.post(reverse("signup"), {
+                "username": f"{USER_PREFIX}{n}",
+                "password1": PASSWORD, "password2": PASSWORD,
+            })
+            if response.status_code != 302:
+                raise RuntimeError(f"signup failed: {response.status_code}")
+        signups = users / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for n in range(users):
+            response = Client().post(reverse("login"), {
+                "username": f"{USER_PREFIX}{n}", "password": PASSWORD,
+            })
+            if response.status_code != 302:
+                raise RuntimeError(f"login failed: {response.status_code}")
+        logins = users / (time.perf_counter() - start)
+        return signups, logins
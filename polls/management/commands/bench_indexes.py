@@ -0,0 +1,109 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from polls.benchmarks import seed
+from polls.benchmarks.seed import BENCH_PREFIX
+from polls.models import Question, Vote
+
+
+class Command(BaseCommand):
+    """
+    Report EXPLAIN plans and latency of the polls hot queries with and
+    without the indexes added in migration 0015.
+
+    The data set is seeded once (questions prefixed with "[bench]" and
+    users named "bench-user-N") and reused by later runs until
+    --cleanup removes it. The indexes are dropped for the "without" run
+    and created again afterwards.
+    """
+
+    help = "Seed votes and compare hot query plans with and without indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--votes", type=int, default=1_000_000)
+        parser.add_argument("--questions", type=int, default=1000)
+        parser.add_argument("--choices", type=int, default=4)
+        parser.add_argument("--repeat", type=int, default=50,
+                            help="Times each query is timed.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--cleanup", action="store_true",
+                            help="Delete the seeded data and exit.")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            seed.cleanup()
+            self.stdout.write("Removed benchmark data.")
+            return
+        if not seed.bench_questions().exists():
+            self.seed(options)
+        samples = self.samples()
+        indexes = [(Question, "question_pub_end_idx"),
+                   (Vote, "vote_user_choice_idx")]
+        self.report("with indexes", samples, options["repeat"])
+        with connection.schema_editor() as editor:
+            for model, name in indexes:
+                editor.remove_index(model, self.index(model, name))
+        try:
+            self.report("without indexes", samples, options["repeat"])
+        finally:
+            with connection.schema_editor() as editor:
+                for model, name in indexes:
+                    editor.add_index(model, self.index(model, name))
+
+    def index(self, model, name):
+        return next(i for i in model._meta.indexes if i.name == name)
+
+    def seed(self, options):
+        """Create the questions, choices, users and votes to query."""
+        questions = options["questions"]
+        users = -(-options["votes"] // questions)
+        self.stdout.write(f"Seeding {options['votes']} votes "
+                          f"({questions} questions x {users} users)...")
+        seed.seed(questions, options["choices"], users, options["votes"],
+                  options["batch_size"])
+
+    def samples(self):
+        """Pick the rows the timed queries look up."""
+        vote = Vote.objects.filter(
+            question__question_text__startswith=BENCH_PREFIX).order_by("?")[0]
+        return {"user": vote.user_id, "question": vote.question_id,
+                "choice": vote.choice_id}
+
+    def queries(self, samples):
+        now = timezone.now()
+        return {
+            "index": Question.objects.filter(pub_date__lte=now)
+            .order_by("-pub_date")[:20],
+            "open polls": Question.objects.filter(pub_date__lte=now,
+                                                  end_date__gte=now)
+            .order_by("-pub_date")[:20],
+            "user vote by choice__question": Vote.objects.filter(
+                user_id=samples["user"],
+                choice__question_id=samples["question"]),
+            "user vote by question": Vote.objects.filter(
+                user_id=samples["user"], question_id=samples["question"]),
+            "user vote by choice": Vote.objects.filter(
+                user_id=samples["user"], choice_id=samples["choice"]),
+            "count by choice": Vote.objects.filter(
+                choice_id=samples["choice"]),
+        }
+
+    def report(self, label, samples, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== {label} =="))
+        for name, queryset in self.queries(samples).items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                # .all() clones the queryset so no result cache is reused
+                if name == "count by choice":
+                    queryset.all().count()
+                else:
+                    list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"{name}: median {statistics.median(timings):.3f} ms, "
+                f"max {max(timings):.3f} ms"
+            )
+            self.stdout.write(queryset.explain())
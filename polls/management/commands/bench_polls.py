@@ -0,0 +1,79 @@
+import json
+from functools import partial
+import django
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from polls.benchmarks import load, seed, unthrottled
+from polls.models import Choice
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the index -> detail -> vote -> results flow.
+
+    Seeds a data set of the requested size (see polls.benchmarks.seed),
+    runs the flow with concurrent workers through the Django test client,
+    or over HTTP against --url, and prints a JSON report. The seeded data
+    is removed afterwards unless --keep is given. With --url the server
+    must use the same database as this command, and should run with
+    POLLS_THROTTLE_LOGIN and POLLS_THROTTLE_VOTE empty, as the workers
+    vote far faster than the throttles allow, and POLLS_SERVER_TIMING on
+    for the query counts to be reported.
+    """
+
+    help = "Benchmark the polls workflow and report it as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=50)
+        parser.add_argument("--choices", type=int, default=4)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--votes", type=int, default=2000,
+                            help="Votes seeded before the run.")
+        parser.add_argument("--flows", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--url",
+                            help="Load this running server instead of "
+                                 "using the test client.")
+        parser.add_argument("--output",
+                            help="Write the report to this file.")
+        parser.add_argument("--keep", action="store_true",
+                            help="Keep the seeded data.")
+
+    @unthrottled()
+    @override_settings(POLLS_SERVER_TIMING=True)
+    def handle(self, *args, **options):
+        question_ids = seed.seed(options["questions"], options["choices"],
+                                 options["users"], options["votes"])
+        try:
+            polls = {}
+            for pk, question_id in Choice.objects.filter(
+                    question_id__in=question_ids).values_list(
+                        "pk", "question_id"):
+                polls.setdefault(question_id, []).append(pk)
+            users = list(seed.bench_users().order_by("pk")
+                         [:options["workers"]])
+            if options["url"]:
+                sessions = [partial(load.HTTPSession, options["url"],
+                                    user.username, seed.BENCH_PASSWORD)
+                            for user in users]
+            else:
+                sessions = [partial(load.ClientSession, user)
+                            for user in users]
+            elapsed, samples = load.run(sessions, polls, options["flows"])
+        finally:
+            if not options["keep"]:
+                seed.cleanup()
+        result = {
+            "date": timezone.now().isoformat(timespec="seconds"),
+            "django": django.get_version(),
+            "config": {key: options[key] for key in (
+                "questions", "choices", "users", "votes", "flows",
+                "workers", "url")},
+            **load.report(elapsed, samples, options["flows"]),
+        }
+        text = json.dumps(result, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(text + "\n")
+        self.stdout.write(text)
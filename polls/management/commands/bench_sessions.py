@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from polls.benchmarks import seed, unthrottled
+from polls.models import Choice
+
+#: (session store, message store) pairs compared, the old setup first.
+SETUPS = [
+    ("db", "session"),
+    ("db", "fallback"),
+    ("cached_db", "fallback"),
+    ("cache", "fallback"),
+    ("signed_cookies", "fallback"),
+]
+
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+class Command(BaseCommand):
+    """
+    Count the database writes of a vote -> results round trip for each
+    session and message storage setup in SETUPS.
+
+    A logged in user votes and then opens the results page, which shows
+    the "vote recorded" message, through the Django test client. Writes
+    to the session table are counted apart from the others.
+    """
+
+    help = "Compare database writes per vote for session/message storages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=100)
+
+    @unthrottled()
+    def handle(self, *args, **options):
+        [question_id] = seed.seed(questions=1, choices=2, users=1, votes=0)
+        try:
+            choices = list(Choice.objects.filter(question_id=question_id)
+                           .values_list("pk", flat=True))
+            user = seed.bench_users().get()
+            for session_store, message_store in SETUPS:
+                with override_settings(
+                    SESSION_ENGINE="django.contrib.sessions.backends."
+                                   f"{session_store}",
+                    MESSAGE_STORAGE=settings.MESSAGE_STORAGES[message_store],
+                ):
+                    session, other = self.round_trips(
+                        user, question_id, choices, options["rounds"])
+                self.stdout.write(
+                    f"sessions {session_store}, messages {message_store}: "
+                    f"{(session + other) / options['rounds']:.2f} writes "
+                    f"per vote ({session / options['rounds']:.2f} to "
+                    f"the session table)"
+                )
+        finally:
+            seed.cleanup()
+
+    def round_trips(self, user, question_id, choices, rounds):
+        """
+        Returns:
+            tuple: (session table writes, other writes) over all rounds.
+        """
+        client = Client()
+        client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            for n in range(rounds):
+                client.post(reverse("polls:vote", args=(question_id,)),
+                            {"choice": choices[n % len(choices)]})
+                client.get(reverse("polls:results", args=(question_id,)))
+        writes = [q["sql"] for q in queries.captured_queries
+                  if q["sql"].startswith(WRITES)]
+        session = sum(1 for sql in writes if "django_session" in sql)
+        return session, len(writes) - session
@@ -0,0 +1,65 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from polls.benchmarks import unthrottled
+from polls.models import Choice, Question
+
+
+class Command(BaseCommand):
+    """
+    Measure votes per second through the whole vote view, using the
+    Django test client against the configured database.
+
+    A throwaway question and users named "bench-voter-N" are created
+    for the run and deleted afterwards. Each user alternates between
+    the choices, so after the first round every vote moves a tally.
+    """
+
+    help = "Benchmark vote submissions through the Django test client."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--votes", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--choices", type=int, default=4)
+
+    @unthrottled()
+    def handle(self, *args, **options):
+        question = Question.objects.create(question_text="Vote benchmark")
+        choices = Choice.objects.bulk_create(
+            [Choice(question=question, choice_text=f"Choice {n}")
+             for n in range(options["choices"])]
+        )
+        users = User.objects.bulk_create(
+            [User(username=f"bench-voter-{n}")
+             for n in range(options["users"])]
+        )
+        try:
+            clients = []
+            for user in users:
+                client = Client()
+                client.force_login(user)
+                clients.append(client)
+            url = reverse("polls:vote", args=(question.id,))
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for n in range(options["votes"]):
+                    choice = choices[(n // len(clients)) % len(choices)]
+                    response = clients[n % len(clients)].post(
+                        url, {"choice": choice.id})
+                    if response.status_code != 302:
+                        raise RuntimeError(
+                            f"vote failed with {response.status_code}")
+                elapsed = time.perf_counter() - start
+        finally:
+            question.delete()
+            User.objects.filter(pk__in=[u.pk for u in users]).delete()
+        votes = options["votes"]
+        self.stdout.write(
+            f"{votes} votes in {elapsed:.2f}s: {votes / elapsed:.0f} votes/s, "
+            f"{elapsed / votes * 1000:.2f} ms/vote, "
+            f"{len(queries) / votes:.1f} queries/vote"
+        )
@@ -0,0 +1,81 @@
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from polls import tally
+from polls.models import Choice, Question
+
+
+class Command(BaseCommand):
+    """
+    Compare concurrent vote-count write throughput on one hot poll with
+    and without sharded counters.
+
+    Each worker thread records votes for the same two choices, one
+    transaction per vote, as vote_for_poll does. Run it against the
+    configured database; on SQLite every write takes the database lock,
+    so sharding only shows its benefit on PostgreSQL.
+    """
+
+    help = "Benchmark vote tally writes with and without counter shards."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--votes", type=int, default=200,
+                            help="Votes recorded by each thread.")
+        parser.add_argument("--shards", type=int, default=8,
+                            help="Shard count for the sharded run.")
+
+    def handle(self, *args, **options):
+        for shards in (1, options["shards"]):
+            question = Question.objects.create(
+                question_text="Vote shard benchmark", vote_shards=shards
+            )
+            choices = [
+                Choice.objects.create(question=question, choice_text=text)
+                for text in ("A", "B")
+            ]
+            try:
+                elapsed, errors = self.run(question, choices,
+                                           options["threads"],
+                                           options["votes"])
+                total = options["threads"] * options["votes"] - errors
+                counted = sum(Choice.objects.get(pk=c.pk).vote
+                              for c in choices)
+            finally:
+                question.delete()
+            self.stdout.write(
+                f"shards={shards:<3} votes={total:<7} "
+                f"time={elapsed:.2f}s rate={total / elapsed:.0f}/s "
+                f"counted={counted} errors={errors}"
+            )
+
+    def run(self, question, choices, threads, votes):
+        """Record votes from several threads; return (seconds, errors)."""
+        errors = []
+        start = threading.Barrier(threads + 1)
+
+        def worker(index):
+            start.wait()
+            try:
+                for n in range(votes):
+                    user_id = index * votes + n
+                    choice = choices[user_id % len(choices)]
+                    shard = tally.shard_for(question, user_id)
+                    try:
+                        with transaction.atomic():
+                            tally.add_vote(choice.id, shard)
+                    except OperationalError:
+                        errors.append(user_id)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(i,))
+                   for i in range(threads)]
+        for thread in workers:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - began, len(errors)
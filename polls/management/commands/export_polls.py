@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from polls import export
+from polls.models import Question
+
+
+class Command(BaseCommand):
+    """
+    Export the results or raw votes of a question as CSV or NDJSON,
+    streamed from the database as the export views do; see polls.export.
+    """
+
+    help = "Export the results or the votes of a question."
+
+    def add_arguments(self, parser):
+        parser.add_argument("question_id", type=int)
+        parser.add_argument("--votes", action="store_true",
+                            help="Export every vote instead of the tally "
+                                 "of each choice.")
+        parser.add_argument("--format", choices=export.FORMATS,
+                            default="csv")
+        parser.add_argument("--output",
+                            help="Write to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        question_id = options["question_id"]
+        if not Question.objects.filter(pk=question_id).exists():
+            raise CommandError(f"Question {question_id} does not exist.")
+        if options["votes"]:
+            fields, rows = export.VOTE_FIELDS, export.vote_rows(question_id)
+        else:
+            fields = export.RESULT_FIELDS
+            rows = export.result_rows(question_id)
+        chunks = export.render(fields, rows, options["format"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8",
+                      newline="") as file:
+                file.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from polls.vote_queue import apply_votes, get_vote_queue
+
+
+class Command(BaseCommand):
+    """
+    Write the votes queued in settings.POLLS_VOTE_QUEUE to the database,
+    in batches, until stopped.
+    """
+
+    help = "Flush queued votes to the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--interval", type=float, default=0.5,
+                            help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true",
+                            help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        queue = get_vote_queue()
+        if queue is None:
+            raise CommandError("POLLS_VOTE_QUEUE is not set.")
+        while True:
+            batch = queue.take(options["batch_size"])
+            if not batch:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+            written = apply_votes(batch)
+            queue.ack([row[0] for row in batch])
+            self.stdout.write(f"Wrote {written} of {len(batch)} queued votes.")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from polls import page_cache, tally
+from polls.models import Question
+
+
+class Command(BaseCommand):
+    """Recompute the stored per-choice vote tallies from the Vote rows."""
+
+    help = "Rebuild the stored vote count of every choice from its votes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "question_ids",
+            nargs="*",
+            type=int,
+            help="Only rebuild the choices of these questions.",
+        )
+
+    def handle(self, *args, **options):
+        question_ids = options["question_ids"] or None
+        with transaction.atomic():
+            updated = tally.rebuild(question_ids)
+            if question_ids is None:
+                question_ids = Question.objects.values_list("pk", flat=True)
+            for question_id in question_ids:
+                page_cache.bump_results(question_id)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt vote counts for {updated} choices.")
+        )
@@ -0,0 +1,91 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+from . import nplusone, perf, throttle
+
+
+class PerformanceMiddleware:
+    """
+    Measure each request's wall time, database queries and template
+    rendering, record them for the perf report and, when
+    settings.POLLS_SERVER_TIMING is on, send them in a Server-Timing
+    header.
+
+    Place it first in MIDDLEWARE so the other middleware's queries are
+    counted too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with perf.measure() as stats:
+            response = self.get_response(request)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        with perf.measure() as stats:
+            response = await self.get_response(request)
+        return self.finish(request, response, stats)
+
+    def process_template_response(self, request, response):
+        render = response.render
+        response.render = lambda: perf.timed_render(render)
+        return response
+
+    def finish(self, request, response, stats):
+        wall_time = stats.wall_time
+        match = request.resolver_match
+        perf.recorder.add(match.view_name if match else "<unresolved>",
+                          stats, wall_time)
+        if settings.POLLS_SERVER_TIMING:
+            response["Server-Timing"] = perf.server_timing(stats, wall_time)
+        return response
+
+
+class NPlusOneMiddleware:
+    """
+    Detect N+1 queries in each request, as configured by
+    settings.POLLS_NPLUSONE_MODE; see polls.nplusone. Removes itself when
+    the mode is "off".
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.POLLS_NPLUSONE_MODE == "off":
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with nplusone.detect():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with nplusone.detect():
+            return await self.get_response(request)
+
+
+class ThrottleMiddleware(MiddlewareMixin):
+    """
+    Refuse logins and votes over their rate with a 429 before the view
+    runs; see polls.throttle. Place it after SessionMiddleware.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return throttle.check(request, request.resolver_match.view_name)
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_existing_votes(apps, schema_editor):
+    """Fill the new vote_count column from the existing Vote rows."""
+    Choice = apps.get_model("polls", "Choice")
+    Vote = apps.get_model("polls", "Vote")
+    counts = (
+        Vote.objects.filter(choice=OuterRef("pk"))
+        .order_by()
+        .values("choice")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Choice.objects.update(vote_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("polls", "0010_remove_choice_vote_vote"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="choice",
+            name="vote_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing_votes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.15 on 2026-10-18 04:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("polls", "0011_choice_vote_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="vote_shards",
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.CreateModel(
+            name="VoteCountShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("shard", models.PositiveSmallIntegerField()),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "choice",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="count_shards",
+                        to="polls.choice",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("choice", "shard"), name="unique_choice_shard"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def copy_question_to_votes(apps, schema_editor):
+    """
+    Copy each vote's question from its choice, then drop all but the latest
+    vote of a user on the same question and recount the affected choices.
+    """
+    Choice = apps.get_model("polls", "Choice")
+    Vote = apps.get_model("polls", "Vote")
+    Vote.objects.update(
+        question_id=Subquery(
+            Choice.objects.filter(pk=OuterRef("choice_id")).values(
+                "question_id"
+            )[:1]
+        )
+    )
+    duplicates = (
+        Vote.objects.order_by()
+        .values("user_id", "question_id")
+        .annotate(latest=Max("pk"), votes=Count("pk"))
+        .filter(votes__gt=1)
+    )
+    stale_questions = set()
+    for group in duplicates:
+        Vote.objects.filter(
+            user_id=group["user_id"], question_id=group["question_id"]
+        ).exclude(pk=group["latest"]).delete()
+        stale_questions.add(group["question_id"])
+    if stale_questions:
+        counts = (
+            Vote.objects.filter(choice=OuterRef("pk"))
+            .order_by()
+            .values("choice")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        apps.get_model("polls", "VoteCountShard").objects.filter(
+            choice__question_id__in=stale_questions
+        ).delete()
+        Choice.objects.filter(question_id__in=stale_questions).update(
+            vote_count=Coalesce(Subquery(counts), Value(0))
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("polls", "0012_vote_count_shards"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vote",
+            name="question",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="polls.question",
+            ),
+        ),
+        migrations.RunPython(copy_question_to_votes, migrations.RunPython.noop),
+    ]
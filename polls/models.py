@@ -7,6 +7,44 @@ from django.contrib.auth.models import User
 # Create your models here.
 
 
+class QuestionQuerySet(models.QuerySet):
+    """
+    Filters questions by their publication and voting period in SQL.
+
+    Every method takes an optional `now` so a request can evaluate all
+    its conditions against one instant; it defaults to the current time.
+    """
+
+    @staticmethod
+    def _open_condition(now):
+        return models.Q(pub_date__lte=now) & (
+            models.Q(end_date__isnull=True) | models.Q(end_date__gte=now)
+        )
+
+    def published(self, now=None):
+        """Questions whose publication date has passed."""
+        return self.filter(pub_date__lte=now or timezone.now())
+
+    def open(self, now=None):
+        """Questions that are open for voting, as Question.can_vote()."""
+        return self.filter(self._open_condition(now or timezone.now()))
+
+    def closed(self, now=None):
+        """Questions that are not, or no longer, open for voting."""
+        return self.exclude(self._open_condition(now or timezone.now()))
+
+    def with_status(self, now=None):
+        """Annotate each question with `is_open`, computed by the database."""
+        return self.annotate(
+            is_open=models.Case(
+                models.When(self._open_condition(now or timezone.now()),
+                            then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            )
+        )
+
+
 class Question(models.Model):
     """
     Represents a poll question.
@@ -16,11 +54,23 @@ class Question(models.Model):
         pub_date (datetime): The date and time when the question was published.
         end_date (datetime): The date and time when the question
             will end (optional).
+        vote_shards (int): The number of counter shards the vote tallies
+            of this question are spread over. 1 keeps the tally on the
+            choice row itself; use more for polls with heavy voting.
     """
 
     question_text = models.CharField(max_length=250)
     pub_date = models.DateTimeField("date published", default=timezone.now)
     end_date = models.DateTimeField("date ended", null=True)
+    vote_shards = models.PositiveSmallIntegerField(default=1)
+
+    objects = QuestionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-pub_date", "end_date"],
+                         name="question_pub_end_idx"),
+        ]
 
     def is_published(self):
         """
@@ -78,15 +128,33 @@ class Choice(models.Model):
     Attributes:
         question (Question): The question to which this choice belongs.
         choice_text (str): The text of the choice.
-        vote (int): The number of votes this choice has received.
+        vote_count (int): The stored number of votes this choice has
+            received, kept in step with the Vote rows by polls.tally.
+            Votes on sharded questions are counted in VoteCountShard rows
+            instead.
     """
 
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=250)
+    vote_count = models.PositiveIntegerField(default=0)
 
     @property
     def vote(self):
-        return Vote.objects.filter(choice=self).count()
+        """
+        Returns the number of votes for this choice.
+
+        The shard total comes from the `shard_votes` annotation when the
+        choice was loaded with one, otherwise it is summed here.
+
+        Returns:
+            int: The stored vote tally, read without querying Vote.
+        """
+        shard_votes = getattr(self, "shard_votes", None)
+        if shard_votes is None:
+            shard_votes = self.count_shards.aggregate(
+                total=models.Sum("count")
+            )["total"] or 0
+        return self.vote_count + shard_votes
 
     def __str__(self):
         """
@@ -98,11 +166,64 @@ class Choice(models.Model):
         return f"Choice ID: {self.id}, Choice: {self.choice_text}, "
 
 
+class VoteCountShard(models.Model):
+    """
+    One slice of the vote tally of a choice on a sharded question.
+
+    Spreading the tally of a popular choice over several rows lets
+    concurrent votes update different rows instead of queueing on one.
+
+    Attributes:
+        choice (Choice): The choice this slice counts votes for.
+        shard (int): The index of this slice, below Question.vote_shards.
+        count (int): The votes counted in this slice. It may go negative
+            when a vote is moved out of a slice other than the one that
+            counted it; only the sum over all slices is meaningful.
+    """
+
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE,
+                               related_name="count_shards")
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["choice", "shard"],
+                                    name="unique_choice_shard"),
+        ]
+
+    def __str__(self):
+        return f"Choice: {self.choice_id}, Shard: {self.shard}, " \
+               f"Count: {self.count}"
+
+
 class Vote(models.Model):
-    """A vote by a user for a choice in a poll"""
+    """
+    A vote by a user for a choice in a poll.
+
+    The question is copied from the choice so that "one vote per user per
+    question" can be enforced by the database and looked up without a join.
+    """
 
     choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "question"],
+                                    name="unique_user_question_vote"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "choice"],
+                         name="vote_user_choice_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Fill in the question from the choice before saving."""
+        if self.question_id is None:
+            self.question_id = self.choice.question_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Choice: {self.choice}, User: {self.user}"
@@ -0,0 +1,121 @@
+"""
+Detect N+1 query patterns in development and tests.
+
+While detection is on, every query is keyed by its SQL, with parameter
+lists collapsed, and by the line of project code that ran it. When one
+key repeats more than the threshold within a request, the request is
+reported: a warning is logged in "warn" mode, NPlusOneError is raised in
+"raise" mode. Typical causes are a model property that queries, used in
+a template loop, or a missing select_related()/prefetch_related().
+
+NPlusOneMiddleware turns it on for every request according to
+settings.POLLS_NPLUSONE_MODE and POLLS_NPLUSONE_THRESHOLD; detect() turns
+it on for a block of code.
+"""
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from . import perf
+
+logger = logging.getLogger("polls.nplusone")
+
+_current = ContextVar("polls_nplusone", default=None)
+
+#: Modes of settings.POLLS_NPLUSONE_MODE.
+MODES = ("off", "warn", "raise")
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+# the execute wrappers themselves are not call sites
+_WRAPPER_FILES = {str(Path(__file__).resolve()),
+                  str(Path(perf.__file__).resolve())}
+
+
+class NPlusOneError(Exception):
+    """Raised in "raise" mode when a query repeats too often."""
+
+
+class _Watch:
+
+    def __init__(self, mode, threshold):
+        self.mode = mode
+        self.threshold = threshold
+        self.counts = Counter()
+
+
+def call_site():
+    """
+    Returns:
+        str: "path:line" of the innermost project code on the stack, or
+            "<unknown>" if the query did not come from project code.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(_PROJECT_DIR)
+                and filename not in _WRAPPER_FILES
+                and "site-packages" not in filename):
+            path = filename[len(_PROJECT_DIR) + 1:]
+            return f"{path}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+def normalize(sql):
+    """Returns the SQL with IN lists of any length made the same."""
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+def watch_query(execute, sql, params, many, context):
+    """Database execute wrapper counting queries while detecting."""
+    watch = _current.get()
+    if watch is not None:
+        key = (call_site(), normalize(sql))
+        watch.counts[key] += 1
+        if watch.counts[key] == watch.threshold + 1:
+            message = (f"N+1 queries: {key[0]} ran this query more than "
+                       f"{watch.threshold} times: {key[1]}")
+            if watch.mode == "raise":
+                raise NPlusOneError(message)
+            logger.warning(message)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_watch(sender, connection, **kwargs):
+    """Watch the queries of every new database connection."""
+    if watch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(watch_query)
+
+
+@contextmanager
+def detect(mode=None, threshold=None):
+    """
+    Detect N+1 queries in the block.
+
+    Args:
+        mode (str): "warn" or "raise"; "off" does nothing. Defaults to
+            settings.POLLS_NPLUSONE_MODE.
+        threshold (int): How many times one call site may run the same
+            query. Defaults to settings.POLLS_NPLUSONE_THRESHOLD.
+    """
+    mode = mode or settings.POLLS_NPLUSONE_MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown N+1 detection mode {mode!r}")
+    if mode == "off":
+        yield
+        return
+    if threshold is None:
+        threshold = settings.POLLS_NPLUSONE_THRESHOLD
+    token = _current.set(_Watch(mode, threshold))
+    try:
+        yield
+    finally:
+        _current.reset(token)
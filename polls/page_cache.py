@@ -0,0 +1,196 @@
+"""
+Cache rendered polls pages for anonymous visitors.
+
+Each cached page belongs to a scope ("index", or "results:<question id>")
+whose version is bumped by the signal receivers in polls.signals whenever
+the data shown in that scope changes. Entries are stored with the version
+they were rendered for, so a bump invalidates them without deleting
+anything. After a bump only one request re-renders a page while the
+others keep serving the previous copy, instead of all of them missing
+the cache and hitting the database at once.
+"""
+import time
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from . import perf
+
+#: Seconds a request may spend re-rendering a page before another one
+#: is allowed to try.
+RENDER_LOCK_TIMEOUT = 10
+
+
+def _version_key(scope):
+    return f"polls:version:{scope}"
+
+
+def _set_version(scope):
+    cache.set(_version_key(scope), time.time_ns(), None)
+
+
+def bump(scope):
+    """
+    Invalidate every cached page of the scope.
+
+    The version changes now, so nothing rendered inside the current
+    transaction is reused, and again when the transaction commits, so a
+    page rendered by another request from the old data is dropped too.
+    """
+    _set_version(scope)
+    transaction.on_commit(lambda: _set_version(scope))
+
+
+def bump_index():
+    """Invalidate the cached pages of the polls index."""
+    bump("index")
+
+
+def bump_results(question_id):
+    """Invalidate the cached results page of a question."""
+    bump(f"results:{question_id}")
+
+
+def cached_content(scope, key, render, timeout):
+    """
+    Return the cached content for `key`, rendering it if it is stale.
+
+    Args:
+        scope (str): The invalidation scope the content belongs to.
+        key (str): The cache key of this piece of content.
+        render (callable): Returns the fresh content as bytes.
+        timeout (int): Seconds to keep the content.
+
+    Returns:
+        bytes: The cached or freshly rendered content.
+    """
+    version_key = _version_key(scope)
+    found = cache.get_many([version_key, key])
+    version = found.get(version_key)
+    if version is None:
+        cache.add(version_key, time.time_ns(), None)
+        version = cache.get(version_key)
+    entry = found.get(key)
+    if entry is not None:
+        if entry[0] == version:
+            return entry[1]
+        if not cache.add(f"{key}:lock", 1, RENDER_LOCK_TIMEOUT):
+            # another request is re-rendering; serve the previous copy
+            return entry[1]
+    content = render()
+    cache.set(key, (version, content), timeout)
+    cache.delete(f"{key}:lock")
+    return content
+
+
+async def acached_content(scope, key, render, timeout):
+    """
+    Async counterpart of cached_content(); `render` is a coroutine
+    function returning the fresh content as bytes.
+    """
+    version_key = _version_key(scope)
+    found = await cache.aget_many([version_key, key])
+    version = found.get(version_key)
+    if version is None:
+        await cache.aadd(version_key, time.time_ns(), None)
+        version = await cache.aget(version_key)
+    entry = found.get(key)
+    if entry is not None:
+        if entry[0] == version:
+            return entry[1]
+        if not await cache.aadd(f"{key}:lock", 1, RENDER_LOCK_TIMEOUT):
+            return entry[1]
+    content = await render()
+    await cache.aset(key, (version, content), timeout)
+    await cache.adelete(f"{key}:lock")
+    return content
+
+
+def can_use_cache(request):
+    """
+    Returns:
+        bool: True if the request may be answered with a cached page,
+            that is, it comes from an anonymous visitor with no flash
+            messages waiting.
+    """
+    return not (request.user.is_authenticated
+                or len(messages.get_messages(request)))
+
+
+class AnonymousPageCacheMixin:
+    """
+    Serve a class-based view from the page cache to anonymous visitors.
+
+    Visitors who are logged in, or have flash messages waiting, always
+    get a freshly rendered page.
+    """
+
+    cache_timeout = 60
+    #: The query parameters that select what the page shows; any others
+    #: are left out of the cache key.
+    cache_query_params = ()
+
+    def get_cache_timeout(self):
+        """Returns the seconds to keep the page."""
+        return self.cache_timeout
+
+    def get_cache_scope(self):
+        """Returns the invalidation scope of the page."""
+        raise NotImplementedError
+
+    def get_cache_params(self):
+        """
+        Returns:
+            list: The (name, value) pairs of the `cache_query_params` the
+                request has.
+        """
+        return [(name, self.request.GET[name])
+                for name in self.cache_query_params
+                if name in self.request.GET]
+
+    def get_cache_key(self):
+        """
+        Returns the cache key of the page: its path and cache params, so
+        an unrelated query string cannot add entries that push out the
+        pages visitors need.
+        """
+        return (f"polls:page:{self.request.path}"
+                f"?{urlencode(self.get_cache_params())}")
+
+    def get(self, request, *args, **kwargs):
+        render_page = super().get
+        if not can_use_cache(request):
+            return render_page(request, *args, **kwargs)
+
+        def render():
+            response = render_page(request, *args, **kwargs)
+            return perf.timed_render(response.render).content
+
+        return HttpResponse(cached_content(self.get_cache_scope(),
+                                           self.get_cache_key(),
+                                           render,
+                                           self.get_cache_timeout()))
+
+    async def aget_cached(self, request, render_page):
+        """
+        Async counterpart of get() for async views.
+
+        Args:
+            request (HttpRequest): The request being answered.
+            render_page (callable): A coroutine function returning the
+                view's unrendered TemplateResponse.
+        """
+        if not await sync_to_async(can_use_cache)(request):
+            return await render_page()
+
+        async def render():
+            response = await render_page()
+            return (await sync_to_async(perf.timed_render)(
+                response.render)).content
+
+        return HttpResponse(await acached_content(self.get_cache_scope(),
+                                                  self.get_cache_key(),
+                                                  render,
+                                                  self.get_cache_timeout()))
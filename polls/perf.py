@@ -0,0 +1,168 @@
+"""
+Measure where the time of each request goes.
+
+polls.middleware.PerformanceMiddleware opens a RequestStats for every
+request. While it is open, the database queries run for the request,
+in any thread, and the rendering of its templates are added to it. When
+the response is ready the request's timings are added to a rolling
+window of recent samples per view, kept in the memory of this process,
+and reported by the staff-only perf endpoint as percentiles.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_current = ContextVar("polls_request_stats", default=None)
+
+#: The percentiles reported for each measure.
+PERCENTILES = (50, 95, 99)
+
+
+class RequestStats:
+    """The timings of one request, in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+    @property
+    def wall_time(self):
+        return time.perf_counter() - self.started
+
+
+@contextmanager
+def measure():
+    """
+    Collect the queries and rendering done until the block exits.
+
+    Yields:
+        RequestStats: The stats being collected.
+    """
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_stats():
+    """
+    Returns:
+        RequestStats: The stats of the request being measured, or None.
+    """
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper timing queries of measured requests."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """Time the queries of every new database connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def timed_render(render):
+    """
+    Call `render`, a TemplateResponse's render method, and count the
+    time spent against the current request.
+
+    Returns:
+        SimpleTemplateResponse: The rendered response.
+    """
+    stats = _current.get()
+    if stats is None:
+        return render()
+    start = time.perf_counter()
+    try:
+        return render()
+    finally:
+        stats.render_time += time.perf_counter() - start
+
+
+def server_timing(stats, wall_time):
+    """
+    Returns:
+        str: A Server-Timing header value for the request's stats.
+    """
+    return (
+        f"total;dur={wall_time * 1000:.1f}, "
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+        f"render;dur={stats.render_time * 1000:.1f}"
+    )
+
+
+def percentile(ordered, percent):
+    """Returns the nearest-rank percentile of sorted samples."""
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """
+    Keeps the timings of the most recent requests of each view.
+
+    Args:
+        size (int): How many recent requests of a view to keep.
+    """
+
+    def __init__(self, size):
+        self.samples = defaultdict(lambda: deque(maxlen=size))
+        self.lock = threading.Lock()
+
+    def add(self, view, stats, wall_time):
+        """Record a measured request of `view`."""
+        sample = (wall_time, stats.queries, stats.db_time, stats.render_time)
+        with self.lock:
+            self.samples[view].append(sample)
+
+    def report(self):
+        """
+        Returns:
+            dict: For each view, the number of requests sampled and the
+                percentiles of their wall, database and render times in
+                milliseconds and of their query counts.
+        """
+        with self.lock:
+            samples = {view: list(window)
+                       for view, window in self.samples.items()}
+        report = {}
+        for view, window in sorted(samples.items()):
+            columns = zip(*window)
+            measures = {}
+            for name, values in zip(("wall_ms", "queries", "db_ms",
+                                     "render_ms"), columns):
+                ordered = sorted(values)
+                scale = 1 if name == "queries" else 1000
+                measures[name] = {
+                    f"p{p}": round(percentile(ordered, p) * scale, 2)
+                    for p in PERCENTILES
+                }
+            report[view] = {"requests": len(window), **measures}
+        return report
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+
+recorder = Recorder(settings.POLLS_PERF_SAMPLES)
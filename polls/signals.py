@@ -0,0 +1,41 @@
+"""
+Invalidate cached polls pages when the data they show changes, and keep
+the tallies right when votes are deleted along with their user.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from . import page_cache, tally
+from .models import Choice, Question, Vote
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    """A question appears on the index and on its own results page."""
+    page_cache.bump_index()
+    page_cache.bump_results(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+@receiver(post_save, sender=Vote)
+def results_changed(sender, instance, **kwargs):
+    """Choices and votes only appear on their question's results page."""
+    page_cache.bump_results(instance.question_id)
+
+
+@receiver(pre_delete, sender=User)
+def voter_deleted(sender, instance, **kwargs):
+    """
+    The votes of a deleted user are taken off the tallies and the results
+    of their questions.
+
+    Vote has no delete receiver of its own, so votes are removed with one
+    DELETE when their user, choice or question is deleted, instead of
+    being fetched and deleted one by one. A deleted choice or question
+    already invalidates its results page.
+    """
+    votes = Vote.objects.filter(user=instance).values_list(
+        "choice_id", "question_id")
+    for choice_id, question_id in votes:
+        tally.remove_vote(choice_id)
+        page_cache.bump_results(question_id)
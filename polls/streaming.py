@@ -0,0 +1,161 @@
+"""
+Push live vote tallies of a question to results pages over Server-Sent
+Events.
+
+All viewers of a question in one server process share a single
+ResultsBroadcaster, which reads the tallies once per interval and hands
+each change to every subscriber, so the database load does not grow
+with the number of viewers.
+
+A stream outlives its request, so it must not hold on to the request's
+database connection: the view releases it once the question is found,
+and the broadcasters read in a context of their own, through the one
+thread and connection Django's async ORM uses outside of a request.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import weakref
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from . import tally
+from .models import Choice
+
+logger = logging.getLogger("polls.streaming")
+
+
+async def read_tallies(question_id):
+    """
+    Returns:
+        dict: The vote count of each choice of the question, keyed by
+            choice id.
+    """
+    choices = tally.with_totals(
+        Choice.objects.filter(question_id=question_id)
+    ).values_list("pk", "vote_count", "shard_votes")
+    return {pk: count + shard_votes
+            async for pk, count, shard_votes in choices}
+
+
+def release_connection():
+    """
+    Close the database connection of the current thread, unless a
+    transaction is still using it.
+    """
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def close_broken_connection():
+    """
+    Close the database connection of the current thread if it is broken
+    or too old, so the next query opens a new one; as release_connection()
+    it leaves a connection inside a transaction alone.
+    """
+    if not connection.in_atomic_block:
+        connection.close_if_unusable_or_obsolete()
+
+
+def format_event(question_id, tallies):
+    """Format the tallies of a question as one SSE `tallies` event."""
+    data = json.dumps({"question": question_id, "choices": tallies},
+                      separators=(",", ":"))
+    return f"event: tallies\ndata: {data}\n\n"
+
+
+class ResultsBroadcaster:
+    """
+    Reads the tallies of one question while anyone is watching and
+    fans every change out to the subscribers.
+
+    Each subscriber gets a queue holding only the latest tallies, so a
+    slow viewer skips intermediate updates instead of piling them up.
+    """
+
+    def __init__(self, question_id, interval):
+        self.question_id = question_id
+        self.interval = interval
+        self.subscribers = set()
+        self.latest = None
+        self._task = None
+
+    def subscribe(self):
+        """
+        Returns:
+            asyncio.Queue: A queue that receives the current tallies and
+                every later change.
+        """
+        queue = asyncio.Queue(maxsize=1)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            # not in the subscriber's context, whose request thread and
+            # connection would otherwise be kept for as long as this runs
+            self._task = asyncio.create_task(self._run(),
+                                             context=contextvars.Context())
+        return queue
+
+    def unsubscribe(self, queue):
+        """Stop sending to the queue; stop reading when nobody is left."""
+        self.subscribers.discard(queue)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self.latest = None
+
+    async def _run(self):
+        while True:
+            try:
+                tallies = await read_tallies(self.question_id)
+            except Exception:
+                # e.g. a lost database connection: keep the viewers, drop
+                # the connection if it is broken, and try again at the
+                # next interval
+                logger.exception("Reading the tallies of question %s "
+                                 "failed", self.question_id)
+                await sync_to_async(close_broken_connection)()
+                tallies = self.latest
+            if tallies != self.latest:
+                self.latest = tallies
+                for queue in self.subscribers:
+                    if queue.full():
+                        queue.get_nowait()
+                    queue.put_nowait(tallies)
+            await asyncio.sleep(self.interval)
+
+
+#: The broadcasters of each running event loop, keyed by question id.
+_broadcasters = weakref.WeakKeyDictionary()
+
+
+def get_broadcaster(question_id):
+    """Returns the broadcaster for the question in the running loop."""
+    loop_broadcasters = _broadcasters.setdefault(
+        asyncio.get_running_loop(), {})
+    if question_id not in loop_broadcasters:
+        loop_broadcasters[question_id] = ResultsBroadcaster(
+            question_id, settings.POLLS_RESULTS_STREAM_INTERVAL)
+    return loop_broadcasters[question_id]
+
+
+async def stream_results(question_id):
+    """
+    Yield SSE events with the question's tallies whenever they change,
+    with a comment line as heartbeat while they do not.
+    """
+    broadcaster = get_broadcaster(question_id)
+    queue = broadcaster.subscribe()
+    try:
+        while True:
+            try:
+                tallies = await asyncio.wait_for(
+                    queue.get(), settings.POLLS_RESULTS_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(question_id, tallies)
+    finally:
+        broadcaster.unsubscribe(queue)
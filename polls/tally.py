@@ -0,0 +1,137 @@
+"""
+Maintain the stored vote tally on each Choice.
+
+The tally is a denormalized copy of the number of Vote rows that point at a
+choice. It must only be changed through these functions, inside the same
+transaction that creates or re-points the Vote, so the two never drift.
+
+Questions with `vote_shards` above 1 count their votes in VoteCountShard
+rows instead of the choice row, so concurrent voters on a hot poll update
+different rows. The tally of a choice is always its `vote_count` plus the
+sum of its shards.
+"""
+import random
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import Choice, Vote, VoteCountShard
+
+
+def shard_for(question, user_id=None):
+    """
+    Pick the counter shard for a vote on the question.
+
+    Args:
+        question (Question): The question being voted on.
+        user_id (int): The voter, used to pick the shard unless
+            settings.POLLS_VOTE_SHARD_BY is "random".
+
+    Returns:
+        int: The shard index, or None when the question is not sharded.
+    """
+    shards = question.vote_shards
+    if shards <= 1:
+        return None
+    if user_id is None or settings.POLLS_VOTE_SHARD_BY == "random":
+        return random.randrange(shards)
+    return user_id % shards
+
+
+def adjust(choice_id, delta, shard=None):
+    """
+    Add `delta` votes to the tally of a choice.
+
+    Args:
+        choice_id (int): The choice to count for.
+        delta (int): The number of votes to add, negative to remove.
+        shard (int): The counter shard to write to, or None to write to
+            the choice row.
+    """
+    if shard is None:
+        choices = Choice.objects.filter(pk=choice_id)
+        if delta >= 0:
+            choices.update(vote_count=F("vote_count") + delta)
+            return
+        if choices.filter(vote_count__gte=-delta).update(
+                vote_count=F("vote_count") + delta):
+            return
+        # the votes are counted on shards, as when the question's
+        # vote_shards was lowered to 1: take them off there instead
+        shard = (
+            VoteCountShard.objects.filter(choice_id=choice_id,
+                                          count__gte=-delta)
+            .values_list("shard", flat=True).first()
+        )
+        if shard is None:
+            return
+    shards = VoteCountShard.objects.filter(choice_id=choice_id, shard=shard)
+    if shards.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            VoteCountShard.objects.create(choice_id=choice_id, shard=shard,
+                                          count=delta)
+    except IntegrityError:
+        # another voter created the shard row first
+        shards.update(count=F("count") + delta)
+
+
+def add_vote(choice_id, shard=None):
+    """Count one more vote for the choice with the given id."""
+    adjust(choice_id, 1, shard)
+
+
+def remove_vote(choice_id, shard=None):
+    """Count one vote less for the choice with the given id."""
+    adjust(choice_id, -1, shard)
+
+
+def move_vote(old_choice_id, new_choice_id, shard=None):
+    """Move one vote from one choice to another."""
+    if old_choice_id == new_choice_id:
+        return
+    remove_vote(old_choice_id, shard)
+    add_vote(new_choice_id, shard)
+
+
+def with_totals(choices):
+    """
+    Annotate a Choice queryset with the sum of its counter shards, so
+    reading `Choice.vote` on the results costs no further queries.
+    """
+    return choices.annotate(
+        shard_votes=Coalesce(Sum("count_shards__count"), Value(0))
+    )
+
+
+def rebuild(question_ids=None):
+    """
+    Recompute the stored tallies from the Vote rows.
+
+    The whole count is written to the choice row and the counter shards
+    are cleared; later votes on sharded questions start new shards.
+
+    Args:
+        question_ids (iterable): Only rebuild choices of these questions,
+            or every choice when None.
+
+    Returns:
+        int: The number of choices updated.
+    """
+    counts = (
+        Vote.objects.filter(choice=OuterRef("pk"))
+        .order_by()
+        .values("choice")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    choices = Choice.objects.all()
+    shards = VoteCountShard.objects.all()
+    if question_ids is not None:
+        choices = choices.filter(question_id__in=question_ids)
+        shards = shards.filter(choice__question_id__in=question_ids)
+    shards.delete()
+    return choices.update(
+        vote_count=Coalesce(Subquery(counts), Value(0))
+    )
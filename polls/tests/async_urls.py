@@ -0,0 +1,10 @@
+"""URL configuration that routes the polls pages to the async views."""
+from django.urls import include, path
+from polls import async_views, views
+from polls.urls import app_name, get_urlpatterns
+
+urlpatterns = [
+    path("polls/", include((get_urlpatterns(async_views), app_name))),
+    path("accounts/", include("django.contrib.auth.urls")),
+    path("signup/", views.signup, name="signup"),
+]
@@ -0,0 +1,65 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from polls.models import Choice, Vote
+from .utils import PollsTestCase, create_question
+
+
+@override_settings(ROOT_URLCONF="polls.tests.async_urls")
+class AsyncViewTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="async")
+        self.question = create_question(question_text="Async poll", days=-1)
+        self.choices = [Choice.objects.create(question=self.question,
+                                              choice_text=f"Choice {n}")
+                        for n in range(2)]
+
+    async def test_index_lists_questions(self):
+        """The async index lists published questions with their status."""
+        await sync_to_async(create_question)(question_text="Future poll",
+                                             days=5)
+        response = await self.async_client.get(reverse("polls:index"))
+        self.assertContains(response, "Async poll")
+        self.assertNotContains(response, "Future poll")
+        self.assertContains(response, "Status: Active")
+
+    async def test_detail_marks_users_vote(self):
+        """The async detail page pre-selects the logged in user's vote."""
+        await Vote.objects.acreate(user=self.user, choice=self.choices[1],
+                                   question=self.question)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse("polls:detail", args=(self.question.id,)))
+        self.assertRegex(response.content.decode(),
+                         rf'value="{self.choices[1].id}"\s+checked')
+
+    async def test_detail_of_missing_question_redirects(self):
+        """A missing question redirects to the index."""
+        response = await self.async_client.get(
+            reverse("polls:detail", args=(self.question.id + 1,)))
+        self.assertRedirects(response, reverse("polls:index"),
+                             fetch_redirect_response=False)
+
+    async def test_vote_and_results(self):
+        """An async vote is recorded and shown on the async results page."""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse("polls:vote", args=(self.question.id,)),
+            {"choice": self.choices[0].id})
+        self.assertRedirects(response, reverse("polls:results",
+                                               args=(self.question.id,)),
+                             fetch_redirect_response=False)
+        response = await self.async_client.get(
+            reverse("polls:results", args=(self.question.id,)))
+        self.assertContains(response, "> 1</td>")
+
+    async def test_vote_requires_login(self):
+        """Anonymous votes are redirected to the login page."""
+        response = await self.async_client.post(
+            reverse("polls:vote", args=(self.question.id,)),
+            {"choice": self.choices[0].id})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("login"), response.url)
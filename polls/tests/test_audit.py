@@ -0,0 +1,67 @@
+import json
+import logging
+from unittest import mock
+from django.contrib.auth.models import User
+from django.urls import reverse
+from polls import audit
+from polls.models import Choice
+from .utils import PollsTestCase, create_question
+
+
+class AuditTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="auditor",
+                                             password="s3cret-pass")
+        self.question = create_question(question_text="Audited", days=-1)
+        self.choice = Choice.objects.create(question=self.question,
+                                            choice_text="Yes")
+
+    def test_vote_emits_vote_cast(self):
+        """A vote logs a vote_cast event with ids rather than names."""
+        self.client.force_login(self.user)
+        with self.assertLogs("polls.audit", "INFO") as logs:
+            self.client.post(reverse("polls:vote", args=(self.question.id,)),
+                             {"choice": self.choice.id})
+        [record] = logs.records
+        self.assertEqual(record.getMessage(), "vote_cast")
+        self.assertEqual(record.audit, {
+            "user_id": self.user.id, "question_id": self.question.id,
+            "choice_id": self.choice.id, "ip": "127.0.0.1", "queued": False,
+        })
+
+    def test_failed_login_emits_login_failed(self):
+        with self.assertLogs("polls.audit", "WARNING") as logs:
+            self.client.post(reverse("login"), {"username": "auditor",
+                                                "password": "wrong"})
+        self.assertEqual([r.getMessage() for r in logs.records],
+                         ["login_failed"])
+
+    def test_anonymous_logout(self):
+        """Logging out without being logged in is logged without a name."""
+        with self.assertLogs("polls.audit", "INFO") as logs:
+            response = self.client.post(reverse("logout"))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(logs.records[0].audit["username"], None)
+
+    def test_disabled_event_is_not_logged(self):
+        """Filtered events are dropped before a record is made."""
+        audit.logger.setLevel(logging.ERROR)
+        self.addCleanup(audit.logger.setLevel, logging.INFO)
+        with mock.patch.object(audit.logger, "log") as log:
+            audit.vote_cast(1, 2, 3, "127.0.0.1")
+        log.assert_not_called()
+
+    def test_json_formatter(self):
+        """An event is formatted as one compact JSON line."""
+        record = audit.logger.makeRecord(
+            "polls.audit", logging.INFO, __file__, 0, "login", None, None,
+            extra={"audit": {"username": "auditor", "ip": "10.0.0.1"}})
+        line = audit.JSONFormatter().format(record)
+        self.assertNotIn(" ", line)
+        data = json.loads(line)
+        self.assertEqual(data["event"], "login")
+        self.assertEqual(data["level"], "INFO")
+        self.assertEqual(data["username"], "auditor")
+        self.assertEqual(data["ip"], "10.0.0.1")
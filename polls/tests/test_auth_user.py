@@ -9,10 +9,11 @@ import django.test
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate  # to "login" a user using code
+from .utils import PollsTestCase
 from polls.models import Question, Choice
 from mysite import settings
 
-class UserAuthTest(django.test.TestCase):
+class UserAuthTest(PollsTestCase):
 
     def setUp(self):
         # superclass setUp creates a Client object and initializes test database
@@ -0,0 +1,40 @@
+from functools import partial
+from django.test import override_settings
+from polls.benchmarks import load, seed
+from polls.models import Choice, Vote
+from .utils import PollsTestCase
+
+
+class BenchmarkTests(PollsTestCase):
+
+    def test_seed(self):
+        """Seeding creates the requested volumes from the fixtures."""
+        question_ids = seed.seed(questions=3, choices=7, users=4, votes=10)
+        self.assertEqual(seed.bench_questions().count(), 3)
+        self.assertEqual(Choice.objects.filter(
+            question_id__in=question_ids).count(), 21)
+        self.assertEqual(seed.bench_users().count(), 4)
+        self.assertEqual(Vote.objects.count(), 10)
+        choice = Choice.objects.filter(question_id__in=question_ids).first()
+        self.assertEqual(choice.vote, Vote.objects.filter(
+            choice=choice).count())
+        seed.cleanup()
+        self.assertFalse(seed.bench_questions().exists())
+        self.assertFalse(seed.bench_users().exists())
+
+    @override_settings(POLLS_SERVER_TIMING=True)
+    def test_run_reports_each_step(self):
+        """A run reports every step of the flow without errors."""
+        question_ids = seed.seed(questions=2, choices=3, users=2, votes=2)
+        polls = {}
+        for choice in Choice.objects.filter(question_id__in=question_ids):
+            polls.setdefault(choice.question_id, []).append(choice.pk)
+        user = seed.bench_users().first()
+        elapsed, samples = load.run([partial(load.ClientSession, user)],
+                                    polls, flows=3)
+        report = load.report(elapsed, samples, flows=3)
+        self.assertEqual(report["all"]["requests"], 12)
+        self.assertEqual(report["all"]["errors"], 0)
+        self.assertEqual(set(report["steps"]), set(load.STEPS))
+        self.assertGreater(
+            report["steps"]["results"]["queries_per_request"]["mean"], 0)
@@ -0,0 +1,41 @@
+from django.test import SimpleTestCase, override_settings
+from polls import checks
+
+LOCMEM = {"default": {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+FILES = {"default": {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": "/tmp/polls-cache"}}
+
+
+class CacheCheckTests(SimpleTestCase):
+
+    def ids(self, check):
+        return [message.id for message in check(None)]
+
+    @override_settings(CACHES=LOCMEM)
+    def test_process_local_cache_warns_about_pages(self):
+        self.assertEqual(self.ids(checks.check_page_cache), ["polls.W001"])
+
+    @override_settings(CACHES=FILES)
+    def test_shared_cache_passes(self):
+        self.assertEqual(self.ids(checks.check_page_cache), [])
+
+    @override_settings(CACHES=LOCMEM,
+                       SESSION_ENGINE="django.contrib.sessions.backends.cache")
+    def test_cached_sessions_need_a_shared_cache(self):
+        self.assertEqual(self.ids(checks.check_session_cache), ["polls.E001"])
+
+    @override_settings(CACHES=LOCMEM,
+                       SESSION_ENGINE="django.contrib.sessions.backends.db")
+    def test_database_sessions_need_no_cache(self):
+        self.assertEqual(self.ids(checks.check_session_cache), [])
+
+    @override_settings(CACHES=LOCMEM, POLLS_THROTTLE_LOGIN="10/60")
+    def test_throttles_need_a_shared_cache(self):
+        self.assertEqual(self.ids(checks.check_throttle_cache), ["polls.E002"])
+
+    @override_settings(CACHES=LOCMEM, POLLS_THROTTLE_LOGIN="",
+                       POLLS_THROTTLE_VOTE="")
+    def test_no_throttles_need_no_cache(self):
+        self.assertEqual(self.ids(checks.check_throttle_cache), [])
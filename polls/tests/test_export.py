@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+import warnings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import AsyncClient
+from django.urls import reverse
+from polls import export, tally
+from polls.models import Choice, Vote
+from .utils import PollsTestCase, create_question
+
+
+class ExportTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.question = create_question(question_text="Exported", days=-1)
+        self.choices = [Choice.objects.create(question=self.question,
+                                              choice_text=text)
+                        for text in ("Yes", "No, \"never\"")]
+        self.voters = [User.objects.create_user(username=f"voter{i}")
+                       for i in range(3)]
+        for voter, choice in zip(self.voters, (0, 1, 1)):
+            Vote.objects.create(user=voter, question=self.question,
+                                choice=self.choices[choice])
+        tally.rebuild([self.question.id])
+
+    def get(self, name, **params):
+        return self.client.get(reverse(f"polls:{name}",
+                                       args=(self.question.id,)), params)
+
+    def test_results_csv(self):
+        response = self.get("export_results")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn(f"question-{self.question.id}-results.csv",
+                      response["Content-Disposition"])
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows, [
+            list(export.RESULT_FIELDS),
+            [str(self.question.id), str(self.choices[0].id), "Yes", "1"],
+            [str(self.question.id), str(self.choices[1].id),
+             "No, \"never\"", "2"],
+        ])
+
+    def test_votes_ndjson_for_staff(self):
+        staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_login(staff)
+        response = self.get("export_votes", format="ndjson")
+        body = b"".join(response.streaming_content).decode()
+        votes = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([vote["user_id"] for vote in votes],
+                         [voter.id for voter in self.voters])
+        self.assertEqual(set(votes[0]), set(export.VOTE_FIELDS))
+
+    def test_votes_are_for_staff_only(self):
+        self.client.force_login(self.voters[0])
+        self.assertEqual(self.get("export_votes").status_code, 302)
+
+    def test_unknown_format(self):
+        self.assertEqual(self.get("export_results", format="xml").status_code,
+                         400)
+
+    def test_render_in_chunks(self):
+        """Each chunk holds at most chunk_size rows."""
+        rows = [(i, i * 2) for i in range(5)]
+        chunks = list(export.render(("a", "b"), rows, "csv", chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("".join(chunks).splitlines(),
+                         ["a,b"] + [f"{a},{b}" for a, b in rows])
+        chunks = list(export.render(("a", "b"), rows, "ndjson",
+                                    chunk_size=2))
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [2, 2, 1])
+
+    async def test_asgi_streams_without_buffering(self):
+        """Under ASGI the export is streamed, not read into a list."""
+        response = await AsyncClient().get(
+            reverse("polls:export_results", args=(self.question.id,)),
+            {"format": "ndjson"})
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            body = b"".join([chunk async for chunk in response])
+        self.assertEqual(len(body.splitlines()), 2)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("export_polls", self.question.id, "--votes",
+                     stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], ",".join(export.VOTE_FIELDS))
+        self.assertEqual(len(lines), 4)
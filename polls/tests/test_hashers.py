@@ -0,0 +1,53 @@
+from unittest import mock
+from django.contrib.auth import get_user
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from polls import hashers
+from .utils import PollsTestCase
+
+PBKDF2 = "polls.hashers.PBKDF2PasswordHasher"
+SCRYPT = "polls.hashers.ScryptPasswordHasher"
+
+
+@override_settings(PASSWORD_HASHERS=[PBKDF2, SCRYPT],
+                   PASSWORD_PBKDF2_ITERATIONS=1000,
+                   PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10)
+class PasswordHasherTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="hashed",
+                                             password="Passw0rd-hash")
+
+    def test_cost_comes_from_settings(self):
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+    def test_login_upgrades_cost(self):
+        """A login re-hashes a password made with another cost."""
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertTrue(self.client.login(username="hashed",
+                                              password="Passw0rd-hash"))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+    def test_login_upgrades_to_preferred_hasher(self):
+        """A login re-hashes a password with the first listed hasher."""
+        with self.settings(PASSWORD_HASHERS=[SCRYPT, PBKDF2]):
+            self.assertTrue(self.client.login(username="hashed",
+                                              password="Passw0rd-hash"))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$"))
+
+    def test_signup_does_not_verify_the_new_password(self):
+        """Signing up hashes the password once and logs the user in."""
+        with mock.patch.object(hashers.PBKDF2PasswordHasher, "verify") \
+                as verify:
+            response = self.client.post(reverse("signup"), {
+                "username": "newcomer",
+                "password1": "NewPassword123!",
+                "password2": "NewPassword123!",
+            })
+        self.assertRedirects(response, reverse("polls:index"))
+        verify.assert_not_called()
+        self.assertEqual(get_user(self.client).username, "newcomer")
@@ -0,0 +1,109 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from polls import importer
+from polls.models import Choice, Question, Vote
+from .utils import PollsTestCase
+
+DATA = settings.BASE_DIR / "data"
+
+
+class IterObjectsTests(PollsTestCase):
+
+    def test_matches_json_load_in_small_chunks(self):
+        """Objects split over many reads decode as json.load() does."""
+        path = DATA / "polls-v4.json"
+        with open(path) as file:
+            expected = json.load(file)
+        with open(path) as file:
+            objects = list(importer.iter_objects(file, chunk_size=7))
+        self.assertEqual(objects, expected)
+
+    def test_rejects_anything_but_an_array_of_objects(self):
+        """Other JSON, and arrays cut short, are reported."""
+        for text in ['{"model": "polls.question"}', '[1, 2]',
+                     '[{"pk": 1}, {"pk": 2']:
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                list(importer.iter_objects(StringIO(text), chunk_size=4))
+
+    def test_empty_array(self):
+        self.assertEqual(list(importer.iter_objects(StringIO(" [ ] "))), [])
+
+
+class UpgradeTests(PollsTestCase):
+
+    def test_v1_choice(self):
+        """A v1 choice gets its question field and loses its counter."""
+        record = importer.upgrade({
+            "model": "polls.choice", "pk": 3,
+            "fields": {"question_text": 1, "choice_text": "macOS",
+                       "vote": 4},
+        })
+        self.assertEqual(record["fields"],
+                         {"question": 1, "choice_text": "macOS"})
+
+    def test_vote_is_matched_without_its_id(self):
+        record = importer.upgrade({"model": "polls.vote", "pk": 9,
+                                   "fields": {"choice": 3, "user": 1}})
+        self.assertNotIn("pk", record)
+
+    def test_unknown_model(self):
+        with self.assertRaises(ValueError):
+            importer.upgrade({"model": "auth.group", "pk": 1, "fields": {}})
+
+
+class ImportPollsCommandTests(PollsTestCase):
+
+    def import_polls(self, *fixtures, batch_size=4):
+        call_command("import_polls", *fixtures, batch_size=batch_size,
+                     stdout=StringIO())
+
+    def test_every_fixture_version(self):
+        """Fixtures v1 to v5 import in batches smaller than a file."""
+        for version in ("v1", "v2", "v3", "v4"):
+            with self.subTest(version=version):
+                self.import_polls(DATA / "users.json",
+                                  DATA / f"polls-{version}.json")
+        self.import_polls(DATA / "votes-v4.json", DATA / "votes-v5.json")
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Question.objects.count(), 6)
+        self.assertEqual(Choice.objects.count(), 30)
+        for vote in Vote.objects.select_related("choice"):
+            self.assertEqual(vote.question_id, vote.choice.question_id)
+
+    def test_tallies_are_rebuilt(self):
+        """Imported votes are counted, and importing again changes
+        nothing."""
+        fixtures = (DATA / "users.json", DATA / "polls-v4.json",
+                    DATA / "votes-v5.json")
+        self.import_polls(*fixtures)
+        self.import_polls(*fixtures)
+        self.assertEqual(Vote.objects.count(), 8)
+        for choice in Choice.objects.all():
+            self.assertEqual(choice.vote,
+                             Vote.objects.filter(choice=choice).count())
+
+    def test_last_vote_of_a_user_wins(self):
+        """Of several votes by a user on a question, the last is kept."""
+        self.import_polls(DATA / "users.json", DATA / "polls-v4.json")
+        votes = [{"model": "polls.vote", "pk": pk,
+                  "fields": {"choice": choice, "user": 1}}
+                 for pk, choice in ((1, 3), (2, 4), (3, 5))]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "votes.json"
+            path.write_text(json.dumps(votes))
+            self.import_polls(path, batch_size=2)
+        self.assertEqual(Vote.objects.get().choice_id, 5)
+
+    def test_vote_for_missing_choice_fails(self):
+        """A vote whose choice does not exist is an error, and nothing
+        of the import is kept."""
+        self.import_polls(DATA / "users.json")
+        with self.assertRaises(CommandError):
+            self.import_polls(DATA / "polls-v1.json", DATA / "votes-v4.json")
+        self.assertFalse(Question.objects.exists())
@@ -0,0 +1,70 @@
+import logging
+import threading
+from django.test import SimpleTestCase
+from polls import log_handlers
+from polls.log_handlers import BackgroundHandler
+
+
+class SlowHandler(logging.Handler):
+    """Collects messages, stalling on the first one until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.started = threading.Event()
+        self.resume = threading.Event()
+
+    def emit(self, record):
+        self.started.set()
+        self.resume.wait(5)
+        self.messages.append(self.format(record))
+
+
+class BackgroundHandlerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.target = SlowHandler()
+        self.handler = BackgroundHandler(self.target, queue_size=2)
+        self.handler.setFormatter(
+            logging.Formatter("%(levelname)s %(message)s"))
+        self.logger = logging.Logger("polls.test")
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.handler.close)
+
+    def test_records_are_written_in_the_background(self):
+        """Records reach the target formatted by the handler's formatter."""
+        self.target.resume.set()
+        self.logger.info("vote by %s", "demo1")
+        self.handler.close()
+        self.assertEqual(self.target.messages, ["INFO vote by demo1"])
+
+    def test_full_queue_drops_and_reports(self):
+        """A full queue drops new records and later logs how many."""
+        self.logger.info("one")
+        self.assertTrue(self.target.started.wait(5))
+        for n in range(2, 7):
+            self.logger.info("record %d", n)
+        self.target.resume.set()
+        self.handler.queue.join()
+        self.logger.info("seven")
+        self.handler.close()
+        self.assertEqual(self.target.messages, [
+            "INFO one",
+            "INFO record 2",
+            "INFO record 3",
+            "WARNING 3 log records dropped: the log queue was full",
+            "INFO seven",
+        ])
+
+    def test_only_open_handlers_restart_after_fork(self):
+        """A closed handler's writer thread is not started again in a
+        forked process."""
+        self.target.resume.set()
+        closed = BackgroundHandler(logging.NullHandler())
+        closed.close()
+        # as in a fork, where the parent's writer threads are gone
+        self.handler.listener.stop()
+        log_handlers._restart_after_fork()
+        self.assertIsNone(closed.listener._thread)
+        self.assertIsNotNone(self.handler.listener._thread)
+        self.assertNotIn(closed, log_handlers._open_handlers)
@@ -0,0 +1,54 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.urls import reverse
+from polls import nplusone, views
+from polls.models import Choice, Question
+from .utils import PollsTestCase, create_question
+
+
+class NPlusOneTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.question = create_question(question_text="Many", days=-1)
+        self.choices = [Choice.objects.create(question=self.question,
+                                              choice_text=f"Choice {n}")
+                        for n in range(4)]
+
+    def test_normalize_collapses_in_lists(self):
+        self.assertEqual(
+            nplusone.normalize('WHERE "id" IN (%s, %s, %s)'),
+            nplusone.normalize('WHERE "id" IN (%s)'),
+        )
+
+    def test_repeated_query_raises(self):
+        """One call site running a query past the threshold raises."""
+        with self.assertRaises(nplusone.NPlusOneError):
+            with nplusone.detect("raise", threshold=2):
+                for choice in self.choices:
+                    Choice.objects.get(pk=choice.pk)
+
+    def test_threshold_is_allowed(self):
+        with nplusone.detect("raise", threshold=4):
+            for choice in self.choices:
+                Choice.objects.get(pk=choice.pk)
+
+    def test_warn_mode_logs(self):
+        with self.assertLogs("polls.nplusone", "WARNING") as logs:
+            with nplusone.detect("warn", threshold=2):
+                for choice in self.choices:
+                    Choice.objects.get(pk=choice.pk)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("test_nplusone.py", logs.output[0])
+
+    def test_request_with_n_plus_one_fails(self):
+        """
+        Results without the tally annotation query once per choice,
+        which fails the request in the test suite.
+        """
+        self.client.force_login(User.objects.create_user(username="n1"))
+        with mock.patch.object(views.ResultsView, "get_queryset",
+                               return_value=Question.objects.all()):
+            with self.assertRaises(nplusone.NPlusOneError):
+                self.client.get(reverse("polls:results",
+                                        args=(self.question.id,)))
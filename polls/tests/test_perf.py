@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from polls import perf
+from polls.models import Choice
+from .utils import PollsTestCase, create_question
+
+
+class PerformanceMiddlewareTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        perf.recorder.clear()
+        self.question = create_question(question_text="Timed", days=-1)
+        Choice.objects.create(question=self.question, choice_text="Yes")
+
+    @override_settings(POLLS_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        """Responses carry their wall, database and render times."""
+        response = self.client.get(
+            reverse("polls:results", args=(self.question.id,)))
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r"^total;dur=[\d.]+, ")
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(timing, r"render;dur=[\d.]+$")
+
+    @override_settings(POLLS_SERVER_TIMING=False)
+    def test_server_timing_can_be_turned_off(self):
+        response = self.client.get(
+            reverse("polls:results", args=(self.question.id,)))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_report_is_for_staff_only(self):
+        User.objects.create_user(username="voter")
+        self.client.force_login(User.objects.get(username="voter"))
+        response = self.client.get(reverse("polls:perf"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_report_percentiles_per_view(self):
+        """The report has percentiles for each view requested."""
+        for _ in range(3):
+            self.client.get(reverse("polls:results",
+                                    args=(self.question.id,)))
+        staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_login(staff)
+        report = self.client.get(reverse("polls:perf")).json()
+        results = report["polls:results"]
+        self.assertEqual(results["requests"], 3)
+        self.assertEqual(set(results), {"requests", "wall_ms", "queries",
+                                        "db_ms", "render_ms"})
+        self.assertEqual(set(results["queries"]), {"p50", "p95", "p99"})
+        self.assertGreater(results["render_ms"]["p99"], 0)
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(perf.percentile(samples, 50), 50)
+        self.assertEqual(perf.percentile(samples, 99), 99)
+        self.assertEqual(perf.percentile([7], 95), 7)
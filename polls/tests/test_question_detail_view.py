@@ -1,7 +1,8 @@
-from .utils import create_question
-from django.test import TestCase
+from .utils import PollsTestCase, create_question
+from django.contrib.auth.models import User
 from django.urls import reverse
-class QuestionDetailViewTests(TestCase):
+from polls.models import Choice, Vote
+class QuestionDetailViewTests(PollsTestCase):
     def test_future_question(self):
         """
         The detail view of a question with a pub_date in the future
@@ -22,4 +23,30 @@ class QuestionDetailViewTests(TestCase):
         response = self.client.get(url)
         self.assertContains(response, past_question.question_text)
 
+    def test_selected_choice_is_checked(self):
+        """The choice the user voted for is pre-selected on the form."""
+        question = create_question(question_text='Voted.', days=-1)
+        choices = [Choice.objects.create(question=question,
+                                         choice_text=f'Choice {n}')
+                   for n in range(3)]
+        user = User.objects.create_user(username='voter')
+        Vote.objects.create(user=user, choice=choices[1])
+        self.client.force_login(user)
+        response = self.client.get(reverse('polls:detail',
+                                           args=(question.id,)))
+        self.assertContains(response, 'checked', count=1)
+        self.assertRegex(response.content.decode(),
+                         rf'value="{choices[1].id}"\s+checked')
 
+    def test_query_count_is_fixed(self):
+        """
+        The question, its choices and the user's vote are loaded in two
+        queries, whatever the number of choices.
+        """
+        question = create_question(question_text='Counted.', days=-1)
+        for n in range(5):
+            Choice.objects.create(question=question, choice_text=f'{n}')
+        user = User.objects.create_user(username='counter')
+        self.client.force_login(user)
+        with self.assertNumPollsQueries(2):
+            self.client.get(reverse('polls:detail', args=(question.id,)))
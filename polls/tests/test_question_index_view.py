@@ -1,9 +1,9 @@
 
-from .utils import create_question
-from django.test import TestCase
+from .utils import PollsTestCase, create_question
+from django.test import override_settings
 from django.urls import reverse
 
-class QuestionIndexViewTests(TestCase):
+class QuestionIndexViewTests(PollsTestCase):
     def test_no_questions(self):
         """
         If no questions exist, an appropriate message is displayed.
@@ -58,4 +58,41 @@ class QuestionIndexViewTests(TestCase):
         self.assertQuerySetEqual(
             (response.context['latest_question_list']),
             [question2, question1],
-        )
\ No newline at end of file
+        )
+
+    @override_settings(POLLS_INDEX_PAGE_SIZE=2)
+    def test_pages_follow_cursor(self):
+        """
+        The index shows one page of questions and a cursor that leads to
+        the next page, until the oldest question is shown.
+        """
+        questions = [create_question(question_text=f"Past question {n}.",
+                                     days=-n) for n in range(1, 6)]
+        pages = []
+        params = {}
+        while True:
+            response = self.client.get(reverse('polls:index'), params)
+            pages.append(list(response.context['latest_question_list']))
+            if not response.context['next_cursor']:
+                break
+            params = {"cursor": response.context['next_cursor']}
+        self.assertEqual(pages, [questions[0:2], questions[2:4], questions[4:]])
+
+    def test_invalid_cursor_shows_first_page(self):
+        """A malformed cursor is ignored and the first page is shown."""
+        question = create_question(question_text="Past question.", days=-1)
+        response = self.client.get(reverse('polls:index'),
+                                   {"cursor": "not-a-cursor"})
+        self.assertQuerySetEqual(response.context['latest_question_list'],
+                                 [question])
+
+    def test_cache_key_keeps_only_a_valid_cursor(self):
+        """
+        Anonymous index pages are cached under their cursor alone, so
+        other parameters and malformed cursors reuse the first page.
+        """
+        create_question(question_text="Past question.", days=-1)
+        self.client.get(reverse('polls:index'))
+        with self.assertNumQueries(0):
+            for params in ({"utm": "x"}, {"cursor": "not-a-cursor"}):
+                self.client.get(reverse('polls:index'), params)
@@ -1,8 +1,8 @@
 import datetime
 from django.utils import timezone
+from .utils import PollsTestCase
 from polls.models import Question
-from django.test import TestCase
-class QuestionModelTests(TestCase):
+class QuestionModelTests(PollsTestCase):
 
     def test_was_published_recently_with_future_question(self):
         """
@@ -77,3 +77,23 @@ class QuestionModelTests(TestCase):
         recent_question = Question(pub_date=time)
         self.assertIs(recent_question.was_published_recently(), True)
 
+    def test_open_and_closed_querysets(self):
+        """open() and closed() split questions as can_vote() does."""
+        now = timezone.now()
+        day = timezone.timedelta(days=1)
+        running = Question.objects.create(question_text="running",
+                                          pub_date=now - day)
+        ending = Question.objects.create(question_text="ending",
+                                         pub_date=now - day,
+                                         end_date=now + day)
+        ended = Question.objects.create(question_text="ended",
+                                        pub_date=now - 2 * day,
+                                        end_date=now - day)
+        future = Question.objects.create(question_text="future",
+                                         pub_date=now + day)
+        self.assertQuerySetEqual(Question.objects.open().order_by("pk"),
+                                 [running, ending])
+        self.assertQuerySetEqual(Question.objects.closed().order_by("pk"),
+                                 [ended, future])
+        for question in Question.objects.with_status():
+            self.assertIs(question.is_open, question.can_vote())
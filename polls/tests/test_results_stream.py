@@ -0,0 +1,94 @@
+import asyncio
+from unittest import mock, skipIf
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, connection
+from django.test import AsyncClient, TransactionTestCase
+from django.urls import reverse
+from polls import streaming, tally
+from polls.models import Choice, Question
+from .utils import PollsTestCase, create_question
+
+
+class ResultsStreamTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.question = create_question(question_text="Live poll", days=-1)
+        self.choices = [Choice.objects.create(question=self.question,
+                                              choice_text=f"Choice {n}")
+                        for n in range(2)]
+        tally.add_vote(self.choices[1].id)
+
+    def test_wsgi_stops_the_event_source(self):
+        """Under WSGI the stream answers 204 without querying, so browsers
+        do not reconnect, and the results page does not open it."""
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse("polls:results_stream", args=(self.question.id,)))
+        self.assertEqual(response.status_code, 204)
+        page = self.client.get(
+            reverse("polls:results", args=(self.question.id,)))
+        self.assertNotContains(page, "EventSource")
+
+    async def test_asgi_results_page_opens_the_stream(self):
+        page = await AsyncClient().get(
+            reverse("polls:results", args=(self.question.id,)))
+        self.assertContains(page, "EventSource")
+
+    async def test_missing_question_is_404(self):
+        response = await AsyncClient().get(
+            reverse("polls:results_stream", args=(self.question.id + 1,)))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_viewers_share_one_read(self):
+        """All subscribers of a question are fed by a single read."""
+        broadcaster = streaming.get_broadcaster(self.question.id)
+        with mock.patch.object(streaming, "read_tallies",
+                               wraps=streaming.read_tallies) as read:
+            viewers = [broadcaster.subscribe() for _ in range(3)]
+            tallies = [await asyncio.wait_for(viewer.get(), 5)
+                       for viewer in viewers]
+            for viewer in viewers:
+                broadcaster.unsubscribe(viewer)
+        self.assertEqual(read.call_count, 1)
+        self.assertEqual(tallies[0], {self.choices[0].id: 0,
+                                      self.choices[1].id: 1})
+        self.assertTrue(all(t == tallies[0] for t in tallies))
+
+    async def test_read_error_does_not_stop_the_updates(self):
+        """A failed read is logged and the broadcaster reads again."""
+        broadcaster = streaming.ResultsBroadcaster(self.question.id, 0.01)
+        tallies = {self.choices[0].id: 3}
+        with mock.patch.object(streaming, "read_tallies",
+                               side_effect=[DatabaseError("gone"), tallies,
+                                            tallies, tallies]), \
+                self.assertLogs("polls.streaming", "ERROR"):
+            viewer = broadcaster.subscribe()
+            received = await asyncio.wait_for(viewer.get(), 5)
+            broadcaster.unsubscribe(viewer)
+        self.assertEqual(received, tallies)
+
+
+@skipIf(connection.vendor == "sqlite",
+        "SQLite connections always report themselves usable")
+class ResultsStreamConnectionTests(TransactionTestCase):
+
+    async def test_broken_connection_is_replaced(self):
+        """A lost connection is closed, and the next read reconnects."""
+        question = await sync_to_async(create_question)("Live poll", days=-1)
+        choice = await Choice.objects.acreate(question=question,
+                                              choice_text="Only")
+
+        def break_connection():
+            connection.ensure_connection()
+            connection.connection.close()
+
+        await sync_to_async(break_connection)()
+        broadcaster = streaming.ResultsBroadcaster(question.id, 0.01)
+        with self.assertLogs("polls.streaming", "ERROR"):
+            viewer = broadcaster.subscribe()
+            received = await asyncio.wait_for(viewer.get(), 5)
+            broadcaster.unsubscribe(viewer)
+        self.assertEqual(received, {choice.id: 0})
+        self.assertTrue(await Question.objects.filter(pk=question.id)
+                        .aexists())
@@ -0,0 +1,99 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from polls.models import Choice, Vote
+from .utils import PollsTestCase, create_question
+
+
+def create_poll(question_text, choices, votes_per_choice=0):
+    """
+    Create a published question with the given number of choices, each
+    voted for by `votes_per_choice` distinct users.
+    """
+    question = create_question(question_text=question_text, days=-1)
+    for n in range(choices):
+        choice = Choice.objects.create(question=question,
+                                       choice_text=f"Choice {n}",
+                                       vote_count=votes_per_choice)
+        for v in range(votes_per_choice):
+            user = User.objects.create_user(username=f"{question.id}-{n}-{v}")
+            Vote.objects.create(user=user, choice=choice)
+    return question
+
+
+class QuestionResultsViewTests(PollsTestCase):
+
+    def test_results_show_vote_counts(self):
+        """The results page lists every choice with its vote count."""
+        question = create_poll("Counted", choices=2, votes_per_choice=3)
+        response = self.client.get(reverse("polls:results",
+                                           args=(question.id,)))
+        self.assertContains(response, "Choice 0")
+        self.assertContains(response, "Choice 1")
+        self.assertContains(response, "> 3</td>", count=2)
+
+    def test_query_count_does_not_grow_with_choices(self):
+        """
+        The results page runs one query for the question and one for its
+        choices, no matter how many choices and votes the question has.
+        """
+        small = create_poll("Small", choices=1)
+        large = create_poll("Large", choices=6, votes_per_choice=4)
+        for question in (small, large):
+            with self.assertNumQueries(2):
+                self.client.get(reverse("polls:results",
+                                        args=(question.id,)))
+
+    def test_anonymous_results_are_cached(self):
+        """A repeated anonymous visit is served without any query."""
+        question = create_poll("Cached", choices=2)
+        url = reverse("polls:results", args=(question.id,))
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, "Choice 1")
+
+    def test_query_string_does_not_add_entries(self):
+        """Unrelated query parameters are served from the same entry."""
+        question = create_poll("Cached once", choices=1)
+        url = reverse("polls:results", args=(question.id,))
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            for n in range(3):
+                self.client.get(url, {"junk": n})
+
+    def test_vote_invalidates_cached_results(self):
+        """A new vote is shown on the next visit to a cached page."""
+        question = create_poll("Invalidated", choices=1)
+        url = reverse("polls:results", args=(question.id,))
+        self.assertContains(self.client.get(url), "> 0</td>")
+        user = User.objects.create_user(username="late-voter",
+                                        password="FatChance!")
+        self.client.force_login(user)
+        choice = question.choice_set.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("polls:vote", args=(question.id,)),
+                             {"choice": choice.id})
+        self.client.logout()
+        self.assertContains(self.client.get(url), "> 1</td>")
+
+    def test_deleted_voter_invalidates_cached_results(self):
+        """
+        Deleting a user refreshes the results they voted on, and removes
+        their votes with one DELETE instead of loading them first.
+        """
+        question = create_poll("Deleted voter", choices=1,
+                               votes_per_choice=1)
+        url = reverse("polls:results", args=(question.id,))
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True), \
+                CaptureQueriesContext(connection) as queries:
+            User.objects.get(username__startswith=f"{question.id}-").delete()
+        sql = [query["sql"] for query in queries]
+        self.assertFalse([q for q in sql if '"polls_vote"."id"' in q])
+        self.assertTrue([q for q in sql
+                         if q.startswith('DELETE FROM "polls_vote"')])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertTrue(queries, "The cached page was served")
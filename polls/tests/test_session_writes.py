@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from polls.models import Choice
+from .utils import PollsTestCase, create_question
+
+
+class SessionWriteTests(PollsTestCase):
+
+    def test_vote_and_results_do_not_write_the_session(self):
+        """The vote message travels in a cookie, not the session row."""
+        question = create_question(question_text="Cookies?", days=-1)
+        choice = Choice.objects.create(question=question, choice_text="Yes")
+        self.client.force_login(User.objects.create_user(username="cookie"))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse("polls:vote", args=(question.id,)),
+                             {"choice": choice.id})
+            response = self.client.get(reverse("polls:results",
+                                               args=(question.id,)))
+        self.assertContains(response, "has been recorded")
+        session_writes = [
+            q["sql"] for q in queries.captured_queries
+            if "django_session" in q["sql"]
+            and q["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        self.assertEqual(session_writes, [])
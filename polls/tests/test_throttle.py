@@ -0,0 +1,98 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from polls.models import Choice
+from polls.throttle import TokenBucket
+from .utils import PollsTestCase, create_question
+
+
+class TokenBucketTests(PollsTestCase):
+
+    def test_burst_then_refill(self):
+        """A bucket allows a burst, then one request per refill interval."""
+        bucket = TokenBucket("test", "2/10")
+        self.assertEqual(bucket.take("a", now=100), 0)
+        self.assertEqual(bucket.take("a", now=100), 0)
+        self.assertEqual(bucket.take("a", now=100), 5)
+        self.assertEqual(bucket.take("b", now=100), 0)
+        self.assertEqual(bucket.take("a", now=105), 0)
+
+
+@override_settings(POLLS_THROTTLE_LOGIN="2/60", POLLS_THROTTLE_VOTE="2/60")
+class ThrottleMiddlewareTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="eager",
+                                             password="Passw0rd-eager")
+        self.question = create_question(question_text="Again?", days=-1)
+        self.choice = Choice.objects.create(question=self.question,
+                                            choice_text="Yes")
+
+    def test_failed_logins_are_throttled(self):
+        """Past the rate, logins get a 429 without checking the password."""
+        url = reverse("login")
+        for _ in range(2):
+            response = self.client.post(url, {"username": "eager",
+                                              "password": "wrong"})
+            self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {"username": "eager",
+                                              "password": "Passw0rd-eager"})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response["Retry-After"]) > 0)
+
+    def test_username_is_throttled_across_ips(self):
+        """Changing IP does not reset the limit of a username."""
+        url = reverse("login")
+        for n in range(2):
+            self.client.post(url, {"username": "eager", "password": "x"},
+                             REMOTE_ADDR=f"10.0.0.{n}")
+        response = self.client.post(url, {"username": "eager",
+                                          "password": "x"},
+                                    REMOTE_ADDR="10.0.0.9")
+        self.assertEqual(response.status_code, 429)
+
+    def test_forwarded_for_does_not_reset_the_ip_limit(self):
+        """A made-up X-Forwarded-For does not give a client a new bucket."""
+        url = reverse("login")
+        for n in range(2):
+            self.client.post(url, {"username": f"user{n}", "password": "x"},
+                             HTTP_X_FORWARDED_FOR=f"203.0.113.{n}")
+        response = self.client.post(url, {"username": "user9",
+                                          "password": "x"},
+                                    HTTP_X_FORWARDED_FOR="203.0.113.9")
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(POLLS_TRUSTED_PROXIES=1)
+    def test_client_behind_trusted_proxy(self):
+        """Behind one proxy, the address it forwarded for is the client,
+        not anything the client put in front of it."""
+        url = reverse("login")
+        for n in range(2):
+            self.client.post(url, {"username": f"user{n}", "password": "x"},
+                             HTTP_X_FORWARDED_FOR=f"198.51.100.{n}, "
+                                                  f"203.0.113.7")
+        response = self.client.post(url, {"username": "user9",
+                                          "password": "x"},
+                                    HTTP_X_FORWARDED_FOR="203.0.113.7")
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(url, {"username": "user9",
+                                          "password": "x"},
+                                    HTTP_X_FORWARDED_FOR="203.0.113.8")
+        self.assertEqual(response.status_code, 200)
+
+    def test_votes_are_throttled(self):
+        self.client.force_login(self.user)
+        url = reverse("polls:vote", args=(self.question.id,))
+        for _ in range(2):
+            response = self.client.post(url, {"choice": self.choice.id})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(url, {"choice": self.choice.id})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_pages_are_not_throttled(self):
+        for _ in range(3):
+            response = self.client.get(reverse("polls:index"))
+            self.assertEqual(response.status_code, 200)
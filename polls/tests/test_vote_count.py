@@ -0,0 +1,153 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from polls import page_cache
+from polls.models import Choice, Vote
+from .utils import PollsTestCase, create_question
+
+
+class VoteCountTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="voter",
+                                             password="FatChance!")
+        self.question = create_question(question_text="Tally", days=-1)
+        self.first = Choice.objects.create(question=self.question,
+                                           choice_text="First")
+        self.second = Choice.objects.create(question=self.question,
+                                            choice_text="Second")
+        self.client.force_login(self.user)
+
+    def vote_for(self, choice):
+        url = reverse("polls:vote", args=(self.question.id,))
+        return self.client.post(url, {"choice": choice.id})
+
+    def test_new_vote_increments_count(self):
+        """Voting for the first time adds one to the chosen choice."""
+        self.vote_for(self.first)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.vote, 1)
+        self.assertEqual(self.second.vote, 0)
+
+    def test_changed_vote_moves_count(self):
+        """Changing a vote moves the count to the new choice."""
+        self.vote_for(self.first)
+        self.vote_for(self.second)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.vote, 0)
+        self.assertEqual(self.second.vote, 1)
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_repeated_vote_keeps_count(self):
+        """Voting again for the same choice does not count twice."""
+        self.vote_for(self.first)
+        self.vote_for(self.first)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.vote, 1)
+
+    def test_vote_statements_are_fixed(self):
+        """
+        A vote loads the choice, reads the previous vote, upserts the
+        vote and updates the tallies, and nothing else on polls tables.
+        """
+        with self.assertNumPollsQueries(4):
+            self.vote_for(self.first)
+        with self.assertNumPollsQueries(5):
+            self.vote_for(self.second)
+
+    def test_choice_of_other_question_is_rejected(self):
+        """A choice that belongs to another question is not counted."""
+        other = create_question(question_text="Other", days=-1)
+        foreign = Choice.objects.create(question=other, choice_text="X")
+        url = reverse("polls:vote", args=(self.question.id,))
+        response = self.client.post(url, {"choice": foreign.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_one_vote_per_user_per_question(self):
+        """The database rejects a second vote row on the same question."""
+        Vote.objects.create(user=self.user, choice=self.first)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Vote.objects.create(user=self.user, choice=self.second)
+
+    def test_rebuild_vote_counts(self):
+        """The management command recomputes counts from the votes."""
+        Vote.objects.create(user=self.user, choice=self.second)
+        Choice.objects.update(vote_count=7)
+        call_command("rebuild_vote_counts", stdout=StringIO())
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.vote, 0)
+        self.assertEqual(self.second.vote, 1)
+
+    def test_rebuild_invalidates_cached_results(self):
+        """Rebuilt tallies are not hidden behind cached results pages."""
+        page_cache.cached_content(f"results:{self.question.id}", "page",
+                                  lambda: b"stale", 60)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_vote_counts", self.question.id,
+                         stdout=StringIO())
+        self.assertEqual(
+            page_cache.cached_content(f"results:{self.question.id}",
+                                      "page", lambda: b"fresh", 60),
+            b"fresh")
+
+    def test_deleted_voter_is_taken_off_the_tally(self):
+        """The votes of a deleted user no longer count."""
+        self.vote_for(self.first)
+        self.question.vote_shards = 4
+        self.question.save()
+        other = User.objects.create_user(username="other")
+        self.client.force_login(other)
+        self.vote_for(self.first)
+        User.objects.filter(pk__in=[self.user.pk, other.pk]).delete()
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.vote, 0)
+
+    def test_admin_cannot_edit_the_tally(self):
+        """The choice admin shows the tally without a field to edit it."""
+        admin = User.objects.create_superuser(username="admin")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:polls_choice_change",
+                                           args=(self.first.id,)))
+        self.assertContains(response, "Vote count")
+        self.assertNotContains(response, 'name="vote_count"')
+
+    def test_sharded_question_counts_votes(self):
+        """Votes on a sharded question are summed over the shards."""
+        self.question.vote_shards = 4
+        self.question.save()
+        other = User.objects.create_user(username="other",
+                                         password="FatChance!")
+        self.vote_for(self.first)
+        self.vote_for(self.second)
+        self.client.force_login(other)
+        self.vote_for(self.second)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.vote_count, 0)
+        self.assertEqual(self.first.vote, 0)
+        self.assertEqual(self.second.vote, 2)
+        call_command("rebuild_vote_counts", stdout=StringIO())
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.vote_count, 2)
+        self.assertEqual(self.second.vote, 2)
+
+    def test_vote_moved_after_shards_are_reduced(self):
+        """A vote counted on a shard is taken off it when the question is
+        back on one counter, instead of being counted twice."""
+        self.question.vote_shards = 4
+        self.question.save()
+        self.vote_for(self.first)
+        self.question.vote_shards = 1
+        self.question.save()
+        self.vote_for(self.second)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.vote, 0)
+        self.assertEqual(self.second.vote, 1)
@@ -0,0 +1,71 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from polls.models import Choice, Vote
+from .utils import PollsTestCase, create_question
+
+
+class VoteQueueTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        journal = tempfile.TemporaryDirectory()
+        self.addCleanup(journal.cleanup)
+        queue_settings = override_settings(
+            POLLS_VOTE_QUEUE=str(Path(journal.name) / "votes.sqlite3"))
+        queue_settings.enable()
+        self.addCleanup(queue_settings.disable)
+        self.user = User.objects.create_user(username="queued")
+        self.question = create_question(question_text="Queued", days=-1)
+        self.first = Choice.objects.create(question=self.question,
+                                           choice_text="First")
+        self.second = Choice.objects.create(question=self.question,
+                                            choice_text="Second")
+        self.client.force_login(self.user)
+
+    def vote_for(self, choice):
+        url = reverse("polls:vote", args=(self.question.id,))
+        return self.client.post(url, {"choice": choice.id})
+
+    def flush(self):
+        call_command("process_vote_queue", "--once", stdout=StringIO())
+
+    def test_vote_is_queued_until_flushed(self):
+        """A queued vote reaches the database when the queue is flushed."""
+        self.vote_for(self.first)
+        self.assertFalse(Vote.objects.exists())
+        self.flush()
+        vote = Vote.objects.get()
+        self.assertEqual(vote.choice, self.first)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.vote, 1)
+
+    def test_voter_sees_queued_vote(self):
+        """The voter's queued vote is shown before it is written."""
+        self.vote_for(self.first)
+        self.flush()
+        self.vote_for(self.second)
+        detail = self.client.get(reverse("polls:detail",
+                                          args=(self.question.id,)))
+        self.assertRegex(detail.content.decode(),
+                         rf'value="{self.second.id}"\s+checked')
+        results = self.client.get(reverse("polls:results",
+                                          args=(self.question.id,)))
+        counts = {c.pk: c.vote for c in
+                  results.context["question"].choice_set.all()}
+        self.assertEqual(counts, {self.first.pk: 0, self.second.pk: 1})
+
+    def test_flush_moves_changed_vote(self):
+        """Re-votes flushed in a later batch move the tally."""
+        self.vote_for(self.first)
+        self.flush()
+        self.vote_for(self.second)
+        self.flush()
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.vote, self.second.vote), (0, 1))
+        self.assertEqual(Vote.objects.get().choice, self.second)
@@ -1,4 +1,9 @@
 import datetime
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from polls.models import Question
 
@@ -11,3 +16,31 @@ def create_question(question_text, days):
     """
     time = timezone.now() + datetime.timedelta(days=days)
     return Question.objects.create(question_text=question_text, pub_date=time)
+
+
+@override_settings(POLLS_NPLUSONE_MODE="raise", POLLS_NPLUSONE_THRESHOLD=2)
+class PollsTestCase(TestCase):
+    """
+    Base class for polls tests.
+
+    The page cache outlives the per-test database rollback, so it is
+    cleared before each test to keep pages from leaking between tests.
+    Requests fail with NPlusOneError when a line of code runs the same
+    query more than twice, so new N+1 patterns break the tests.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    @contextmanager
+    def assertNumPollsQueries(self, num):
+        """
+        Like assertNumQueries(), but only counts queries on the polls
+        tables, so session and authentication lookups do not matter.
+        """
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        queries = [q["sql"] for q in context.captured_queries
+                   if "polls_" in q["sql"]]
+        self.assertEqual(len(queries), num, "\n".join(queries))
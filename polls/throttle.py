@@ -0,0 +1,114 @@
+"""
+Token-bucket throttling of logins and votes.
+
+Each throttled view has a rate, "N/S": a client may make bursts of up to
+N requests, and regains N requests every S seconds. A request is charged
+to one bucket for the client's IP address and one for the account it
+acts for, so neither a spread of IPs nor a spread of accounts gets
+around the limit. The buckets live in the Django cache, so all workers
+sharing a cache share them.
+
+Reading and updating a bucket is not atomic, so a few concurrent
+requests may slip through at the edge of the limit; that is accepted in
+exchange for not locking.
+
+polls.middleware.ThrottleMiddleware checks the buckets before the view
+runs, so a throttled request costs neither a password hash nor a query.
+"""
+import hashlib
+import math
+import time
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.http import HttpResponse
+from . import audit
+from .views import get_client_ip
+
+
+def parse_rate(rate):
+    """
+    Returns:
+        tuple: (burst size, seconds to regain it) of a "N/S" rate.
+    """
+    capacity, period = rate.split("/")
+    return int(capacity), float(period)
+
+
+class TokenBucket:
+    """
+    A token bucket per identity, stored in the cache.
+
+    Args:
+        name (str): Name of the throttled action, part of the cache keys.
+        rate (str): The "N/S" rate; see parse_rate().
+    """
+
+    def __init__(self, name, rate):
+        self.name = name
+        self.capacity, self.period = parse_rate(rate)
+        self.refill = self.capacity / self.period
+
+    def take(self, identity, now=None):
+        """
+        Take a token from the identity's bucket if it has one.
+
+        Returns:
+            int: 0 if the request may go ahead, otherwise the seconds
+                until the bucket has a token again.
+        """
+        now = time.time() if now is None else now
+        digest = hashlib.sha256(identity.encode()).hexdigest()[:32]
+        key = f"polls:throttle:{self.name}:{digest}"
+        tokens, updated = cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill)
+        if tokens < 1:
+            return math.ceil((1 - tokens) / self.refill)
+        # a bucket left alone for a period is full again, so it can expire
+        cache.set(key, (tokens - 1, now), math.ceil(self.period))
+        return 0
+
+
+def _login_account(request):
+    return request.POST.get("username", "")
+
+
+def _session_user(request):
+    # the session holds the user id; loading the user would be a query
+    return request.session.get(SESSION_KEY, "")
+
+
+#: The throttled views: URL name -> (rate setting, account of request).
+THROTTLED_VIEWS = {
+    "login": ("POLLS_THROTTLE_LOGIN", _login_account),
+    "polls:vote": ("POLLS_THROTTLE_VOTE", _session_user),
+}
+
+
+def check(request, view_name):
+    """
+    Charge a POST to a throttled view to its client's buckets.
+
+    Returns:
+        HttpResponse: A 429 response with Retry-After when a bucket is
+            empty, or None if the request may go ahead.
+    """
+    if request.method != "POST" or view_name not in THROTTLED_VIEWS:
+        return None
+    setting, account = THROTTLED_VIEWS[view_name]
+    rate = getattr(settings, setting)
+    if not rate:
+        return None
+    bucket = TokenBucket(view_name, rate)
+    ip_address = get_client_ip(request)
+    identities = [f"ip:{ip_address}"]
+    if account(request):
+        identities.append(f"account:{account(request)}")
+    retry_after = max(bucket.take(identity) for identity in identities)
+    if not retry_after:
+        return None
+    audit.throttled(view_name, ip_address, retry_after)
+    response = HttpResponse("Too many requests; try again later.",
+                            status=429, content_type="text/plain")
+    response["Retry-After"] = str(retry_after)
+    return response
@@ -1,12 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+from .views import export_results, export_votes, perf_report
 
 
 app_name = "polls"
 
-urlpatterns = [
-    path('', views.IndexView.as_view(), name='index'),
-    path('<int:pk>/', views.DetailView.as_view(), name='detail'),
-    path('<int:pk>/results/', views.ResultsView.as_view(), name='results'),
-    path('<int:question_id>/vote/', views.vote, name='vote'),
-]
+
+def get_urlpatterns(views):
+    """Returns the polls URL patterns routed to the given views module."""
+    return [
+        path('', views.IndexView.as_view(), name='index'),
+        path('<int:pk>/', views.DetailView.as_view(), name='detail'),
+        path('<int:pk>/results/', views.ResultsView.as_view(), name='results'),
+        path('<int:question_id>/vote/', views.vote, name='vote'),
+        path('<int:pk>/results/stream/', async_views.results_stream,
+             name='results_stream'),
+        path('<int:pk>/results/export/', export_results,
+             name='export_results'),
+        path('<int:pk>/votes/export/', export_votes, name='export_votes'),
+        path('perf/', perf_report, name='perf'),
+    ]
+
+
+urlpatterns = get_urlpatterns(
+    async_views if settings.POLLS_ASYNC_VIEWS else views
+)
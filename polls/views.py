@@ -1,31 +1,54 @@
+import binascii
 import logging
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, render, redirect
-from django.http import Http404, HttpResponseRedirect
+from django.http import (Http404, HttpResponseBadRequest, HttpResponseRedirect,
+                         JsonResponse)
 from django.contrib.auth.signals import (
     user_logged_in,
     user_logged_out,
     user_login_failed,
 )
-from django.contrib.auth import login, authenticate
+from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
 from django.dispatch import receiver
 from django.urls import reverse
 from django.views import generic
 from django.utils import timezone
 from django.contrib import messages
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Q
 from .models import Question, Choice, Vote
+from . import audit, export, page_cache, perf, tally
+from .page_cache import AnonymousPageCacheMixin
+from .vote_queue import get_vote_queue, pending_choice_for
 
 
 def get_client_ip(request):
-    """Get the visitor’s IP address using request headers."""
+    """
+    Get the visitor's IP address.
+
+    X-Forwarded-For is only trusted for the settings.POLLS_TRUSTED_PROXIES
+    proxies in front of the server: each appends the address it got the
+    request from, so the visitor is the right-most address that none of
+    them added. Anything further left was sent by the client and may be
+    made up.
+    """
     if (request is None):
         return False
+    ip_address = request.META.get("REMOTE_ADDR")
+    proxies = settings.POLLS_TRUSTED_PROXIES
     x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-    if x_forwarded_for:
-        ip_address = x_forwarded_for.split(",")[0]
-    else:
-        ip_address = request.META.get("REMOTE_ADDR")
+    if proxies and x_forwarded_for:
+        hops = [hop.strip() for hop in x_forwarded_for.split(",")]
+        hops.append(ip_address)
+        ip_address = hops[max(len(hops) - 1 - proxies, 0)]
     return ip_address
 
 
@@ -34,10 +57,7 @@ def log_user_login_failed(request, credentials, **kwargs):
     """
     Get the signal, when user failed login.
     """
-    logger = logging.getLogger("polls")
-    ip = get_client_ip(request)
-    username = credentials.get("username", None)
-    logger.warning(f"Failed login for {username} from {ip}")
+    audit.login_failed(credentials.get("username"), get_client_ip(request))
 
 
 @receiver(user_logged_in)
@@ -45,36 +65,116 @@ def log_user_login(request, user, **kwargs):
     """
     Get the signal, when user logged in.
     """
-    logger = logging.getLogger("polls")
-    ip_address = get_client_ip(request)
-    logger.info(f'User "{user.username}" logged in from IP {ip_address}.')
+    audit.login(user.username, get_client_ip(request))
 
 
 @receiver(user_logged_out)
 def log_user_logout(request, user, **kwargs):
     """
-    Get the signal, when user logged out.
+    Get the signal, when user logged out. `user` is None when the
+    visitor was not logged in.
     """
-    logger = logging.getLogger("polls")
-    ip_address = get_client_ip(request)
-    logger.info(f'User "{user.username}" logged out from IP {ip_address}.')
+    audit.logout(getattr(user, "username", None), get_client_ip(request))
+
+
+def encode_cursor(question):
+    """Encode the position of a question in the index as a page cursor."""
+    position = f"{question.pub_date.isoformat()}|{question.pk}"
+    return urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a page cursor made by encode_cursor().
+
+    Returns:
+        tuple: The (pub_date, pk) of the last question on the previous
+            page, or None if the cursor is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        pub_date, pk = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(pub_date), int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
 
 
-class IndexView(generic.ListView):
+class IndexView(AnonymousPageCacheMixin, generic.ListView):
     """
-    View to display the list of the most recent questions.
+    View to display the list of the most recent questions, one page at
+    a time.
+
+    Pages are addressed by a `cursor` query parameter holding the
+    position of the last question on the previous page, so every page
+    costs the same index range scan no matter how deep it is.
+    Anonymous visitors are served from the page cache.
     """
 
     template_name = "polls/index.html"
     context_object_name = "latest_question_list"
+    cache_query_params = ("cursor",)
 
-    def get_queryset(self):
+    def get_cache_scope(self):
+        return "index"
+
+    def get_cache_params(self):
+        # a malformed cursor shows the first page, so it shares its entry
+        params = super().get_cache_params()
+        if decode_cursor(self.request.GET.get("cursor")) is None:
+            return []
+        return params
+
+    def get_cache_timeout(self):
+        # open/closed status changes with time, not only with the data
+        return settings.POLLS_INDEX_CACHE_TIMEOUT
+
+    def get_page_queryset(self):
         """
-        Returns the last five published questions (excluding future questions).
+        Returns the unevaluated query for one page of published questions
+        (excluding future questions), newest first, each with its
+        `is_open` status. It fetches one question more than a page to
+        tell whether there is a next page.
         """
-        return Question.objects.filter(pub_date__lte=timezone.now()).order_by(
-            "-pub_date"
+        now = timezone.now()
+        questions = (
+            Question.objects.published(now)
+            .with_status(now)
+            .order_by("-pub_date", "-pk")
         )
+        cursor = decode_cursor(self.request.GET.get("cursor"))
+        if cursor is not None:
+            pub_date, pk = cursor
+            questions = questions.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        return questions[:settings.POLLS_INDEX_PAGE_SIZE + 1]
+
+    def paginate(self, questions):
+        """
+        Cut the fetched questions down to one page and remember the
+        cursor of the next page.
+        """
+        page_size = settings.POLLS_INDEX_PAGE_SIZE
+        self.next_cursor = None
+        if len(questions) > page_size:
+            questions = questions[:page_size]
+            self.next_cursor = encode_cursor(questions[-1])
+        return questions
+
+    def get_queryset(self):
+        """
+        Returns one page of published questions.
+        """
+        return self.paginate(list(self.get_page_queryset()))
+
+    def get_context_data(self, **kwargs):
+        """
+        Add the cursor of the next page, or None on the last page.
+        """
+        context = super().get_context_data(**kwargs)
+        context["next_cursor"] = self.next_cursor
+        return context
 
 
 class DetailView(generic.DetailView):
@@ -87,26 +187,20 @@ class DetailView(generic.DetailView):
 
     def get_queryset(self):
         """
-        Excludes any questions that aren't published yet.
-        """
-        return Question.objects.filter(pub_date__lte=timezone.now())
-
-    def get_context_data(self, **kwargs):
+        Loads the question with its choices in two queries. For a logged
+        in user each choice is marked `voted` if it holds their vote.
         """
-        Get the context data for the view.
-        """
-        context = super().get_context_data(**kwargs)
-        self.object = self.get_object()
-        vote = None
+        choices = Choice.objects.order_by("pk")
         if self.request.user.is_authenticated:
-            try:
-                vote = Vote.objects.get(
-                    user=self.request.user, choice__question=self.object
+            choices = choices.annotate(
+                voted=Exists(
+                    Vote.objects.filter(user=self.request.user,
+                                        choice=OuterRef("pk"))
                 )
-            except Vote.DoesNotExist:
-                vote = None
-        context["vote"] = vote
-        return context
+            )
+        return Question.objects.prefetch_related(
+            Prefetch("choice_set", queryset=choices)
+        )
 
     def get(self, request, *args, **kwargs):
         """
@@ -122,14 +216,38 @@ class DetailView(generic.DetailView):
             HttpResponse: The rendered response with question details.
         """
         try:
-            self.object = get_object_or_404(Question, pk=kwargs["pk"])
+            self.object = self.get_object()
         except Http404:
-            messages.error(
-                request, f"Poll number with ID {kwargs['pk']} is not available"
-            )
-            logging.error(f"This question {self.object.pk} does not exist")
-            return redirect("polls:index")
+            return self.reject_missing(request, kwargs["pk"])
+
+        rejection = self.reject_unavailable(request)
+        if rejection is not None:
+            return rejection
 
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+    def reject_missing(self, request, pk):
+        """
+        Redirect to the index with an error when the question does not
+        exist.
+        """
+        messages.error(
+            request, f"Poll number with ID {pk} is not available"
+        )
+        logging.getLogger("polls").error("This question %s does not exist",
+                                         pk)
+        return redirect("polls:index")
+
+    def reject_unavailable(self, request):
+        """
+        Redirect to the index with an error when the loaded question is
+        not open for voting.
+
+        Returns:
+            HttpResponse: The redirect, or None if the question can be
+                shown.
+        """
         if not self.object.can_vote():
             messages.error(
                 request,
@@ -143,28 +261,82 @@ class DetailView(generic.DetailView):
                 request, f"Poll number {self.object.pk} " f"is not available"
             )
             return redirect("polls:index")
+        return None
 
-        if self.request.user.is_authenticated:
-            context = self.get_context_data()
-            return render(request, "polls/detail.html", context=context)
-
-        return render(request, "polls/detail.html", {"question": self.object})
+    def get_context_data(self, **kwargs):
+        """
+        Mark the user's queued vote, if any, as their selected choice.
+        """
+        context = super().get_context_data(**kwargs)
+        pending = pending_choice_for(self.request.user, self.object)
+        if pending is not None:
+            for choice in self.object.choice_set.all():
+                choice.voted = choice.pk == pending
+        return context
 
 
-class ResultsView(generic.DetailView):
+class ResultsView(AnonymousPageCacheMixin, generic.DetailView):
     """
     View to display the results of a specific question.
+
+    Anonymous visitors are served from the page cache, which is
+    invalidated whenever a vote is recorded.
     """
 
     model = Question
     template_name = "polls/results.html"
 
+    def get_cache_scope(self):
+        return f"results:{self.kwargs['pk']}"
+
+    def get_cache_timeout(self):
+        return settings.POLLS_RESULTS_CACHE_TIMEOUT
+
+    def get_context_data(self, **kwargs):
+        """
+        Count the user's queued vote, if any, in place of their recorded
+        one, so they see their vote before it is written. `live_results`
+        turns on the live tallies, which only stream under ASGI.
+        """
+        context = super().get_context_data(**kwargs)
+        context["live_results"] = isinstance(self.request, ASGIRequest)
+        pending = pending_choice_for(self.request.user, self.object)
+        if pending is not None:
+            recorded = (
+                Vote.objects.filter(user=self.request.user,
+                                    question=self.object)
+                .values_list("choice_id", flat=True)
+                .first()
+            )
+            if recorded != pending:
+                for choice in self.object.choice_set.all():
+                    if choice.pk == recorded:
+                        choice.vote_count -= 1
+                    elif choice.pk == pending:
+                        choice.vote_count += 1
+        return context
+
+    def get_queryset(self):
+        """
+        Loads the question together with its choices and their stored
+        vote counts, so the page costs the same number of queries
+        however many choices and votes there are.
+        """
+        return Question.objects.prefetch_related(
+            Prefetch("choice_set",
+                     queryset=tally.with_totals(Choice.objects.order_by("pk")))
+        )
+
 
 @login_required
 def vote(request, question_id):
     """
     Handles voting for a specific question.
 
+    A valid submission costs one query to load the chosen choice with
+    its question, then one transaction in vote_for_poll(), or an append
+    to the vote queue when settings.POLLS_VOTE_QUEUE is set.
+
     Args:
         request (HttpRequest): The request object.
         question_id (int): The ID of the question being voted on.
@@ -173,11 +345,21 @@ def vote(request, question_id):
         HttpResponse: Redirect to the results page
         or re-render voting form with an error message.
     """
-    question = get_object_or_404(Question, pk=question_id)
     this_user = request.user
-    logger = logging.getLogger(__name__)
     ip_address = get_client_ip(request)
-    logger.info(f"{this_user} log in from {ip_address}")
+
+    choice_id = request.POST.get("choice", "")
+    selected_choice = None
+    if choice_id.isdigit():
+        selected_choice = (
+            Choice.objects.select_related("question")
+            .filter(pk=choice_id, question_id=question_id)
+            .first()
+        )
+    if selected_choice is None:
+        question = get_object_or_404(Question, pk=question_id)
+    else:
+        question = selected_choice.question
 
     # The question has ended already
     if not question.can_vote():
@@ -185,16 +367,13 @@ def vote(request, question_id):
             request,
             f"Poll number {question.id}  " f"is unavailable for voting.",
         )
-        logger.warning("This question is not yet voted")
+        audit.vote_rejected(this_user.id, question.id, "closed", ip_address)
         return HttpResponseRedirect(reverse("polls:index"))
 
-    try:
-        selected_choice = question.choice_set.get(pk=request.POST["choice"])
-    except (KeyError, Choice.DoesNotExist):
+    if selected_choice is None:
         messages.error(request, "You didn't select a choice.")
-        logger.warning(f"{this_user} didn't select a choice "
-                       f"" f"from {ip_address}."
-                       )
+        audit.vote_rejected(this_user.id, question.id, "no_choice",
+                            ip_address)
         return render(
             request,
             "polls/detail.html",
@@ -203,44 +382,102 @@ def vote(request, question_id):
             },
         )
 
-    vote_for_poll(request, question.id, logger, selected_choice, this_user)
+    queue = get_vote_queue()
+    if queue is None:
+        vote_for_poll(question, selected_choice, this_user)
+    else:
+        queue.put(this_user.pk, question.id, selected_choice.id)
+    messages.success(
+        request, f"Your vote for {selected_choice} " f"has been recorded."
+    )
+    audit.vote_cast(this_user.id, question.id, selected_choice.id,
+                    ip_address, queued=queue is not None)
     return HttpResponseRedirect(reverse("polls:results", args=(question.id,)))
 
 
-def vote_for_poll(request, question_id, logger, selected_choice, this_user):
+def vote_for_poll(question, selected_choice, this_user):
     """
-    Handles voting for a specific question.
+    Record the user's vote for a choice, replacing any earlier vote of
+    theirs on the question, and move the stored tallies to match.
+
+    Runs in one transaction: lock the user's row, read their previous
+    choice, upsert the vote and update one or two tallies. The lock
+    serializes concurrent submissions by the same user, so the previous
+    choice cannot change between the read and the upsert.
+
+    Args:
+        question (Question): The question being voted on.
+        selected_choice (Choice): The chosen choice of that question.
+        this_user (User): The voter.
     """
-    choice_id = request.POST["choice"]
-    question = get_object_or_404(Question, pk=question_id)
-    if not choice_id:
-        # no choice_id was set
-        messages.error(request, "You didn't make a choice")
-        return redirect("polls:detail", question_id)
-    try:
-        vote = this_user.vote_set.get(user=this_user,
-                                      choice__question=question
-                                      )
-        vote.choice = selected_choice
-        vote.save()
-        messages.success(
-            request, f"Your vote for {selected_choice} " f"has been recorded."
-        )
-        logger.info(
-            f"{this_user.username} has voted for {question.id} "
-            f"with {choice_id}"
+    shard = tally.shard_for(question, this_user.id)
+    with transaction.atomic():
+        User.objects.select_for_update().filter(pk=this_user.pk).exists()
+        old_choice_id = (
+            Vote.objects.filter(user=this_user, question=question)
+            .values_list("choice_id", flat=True)
+            .first()
         )
-    except Vote.DoesNotExist:
-        vote = Vote.objects.create(user=this_user, choice=selected_choice)
-        vote.save()
-        messages.success(
-            request, f"Your vote for {selected_choice} " f"has been recorded."
+        Vote.objects.bulk_create(
+            [Vote(user=this_user, question=question, choice=selected_choice)],
+            update_conflicts=True,
+            unique_fields=["user", "question"],
+            update_fields=["choice"],
         )
-        logger.info(
-            f"{this_user.username} has voted for {question.id} "
-            f"with {choice_id}"
-        )
-    return redirect("polls:results", question_id)
+        if old_choice_id is None:
+            tally.add_vote(selected_choice.id, shard)
+        else:
+            tally.move_vote(old_choice_id, selected_choice.id, shard)
+        page_cache.bump_results(question.id)
+
+
+@staff_member_required
+def perf_report(request):
+    """
+    Report the timings of recent requests, per view, for staff.
+
+    The samples are kept in the memory of each server process, so the
+    report only covers the requests of the worker that answers it; with
+    several workers, each call may come from a different one.
+
+    Returns:
+        JsonResponse: The percentiles of wall time, query count, database
+            time and render time of each view; see perf.Recorder.report().
+    """
+    return JsonResponse(perf.recorder.report())
+
+
+def _export(request, fields, rows, filename):
+    fmt = request.GET.get("format", "csv")
+    if fmt not in export.FORMATS:
+        return HttpResponseBadRequest(
+            f"Unknown format; use one of {', '.join(export.FORMATS)}.")
+    return export.streaming_response(
+        request, export.render(fields, rows, fmt), fmt, filename)
+
+
+def export_results(request, pk):
+    """
+    Download the vote tally of each choice of a question.
+
+    The ?format= parameter picks "csv" (the default) or "ndjson".
+    """
+    question = get_object_or_404(Question, pk=pk)
+    return _export(request, export.RESULT_FIELDS,
+                   export.result_rows(question.pk),
+                   f"question-{question.pk}-results")
+
+
+@staff_member_required
+def export_votes(request, pk):
+    """
+    Download every vote on a question, for staff, streamed from the
+    database however many there are. Takes ?format= as export_results.
+    """
+    question = get_object_or_404(Question, pk=pk)
+    return _export(request, export.VOTE_FIELDS,
+                   export.vote_rows(question.pk),
+                   f"question-{question.pk}-votes")
 
 
 def signup(request):
@@ -248,13 +485,11 @@ def signup(request):
     if request.method == "POST":
         form = UserCreationForm(request.POST)
         if form.is_valid():
-            form.save()
-            # get named fields from the form data
-            username = form.cleaned_data.get("username")
-            # password input field is named 'password1'
-            raw_passwd = form.cleaned_data.get("password1")
-            user = authenticate(username=username, password=raw_passwd)
-            login(request, user)
+            # log the new user in directly; authenticate() would only
+            # hash the password a second time
+            user = form.save()
+            login(request, user,
+                  backend="django.contrib.auth.backends.ModelBackend")
             return redirect("polls:index")
         else:
             messages.error(request, "Your register is invalid")
@@ -0,0 +1,193 @@
+"""
+Queue votes in a local journal and write them to the database in batches.
+
+When settings.POLLS_VOTE_QUEUE names a file, the vote view only checks
+the submission and appends it to that SQLite journal; the
+process_vote_queue management command writes the queued votes to the
+database in batches. A voter's queued vote is shown back to them on the
+detail and results pages until it has been written, so they always see
+their own latest vote.
+
+A user has at most one queued vote per question: voting again replaces
+the queued entry.
+"""
+import sqlite3
+import threading
+from collections import Counter
+from functools import lru_cache
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from . import page_cache, tally
+from .models import Choice, Vote
+
+
+class VoteQueue:
+    """
+    A durable journal of votes waiting to be written to the database.
+
+    Each thread uses its own connection to the journal, which runs in
+    WAL mode so several web workers can append while the flusher reads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30,
+                                 isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS pending_vote ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " user_id INTEGER NOT NULL,"
+                " question_id INTEGER NOT NULL,"
+                " choice_id INTEGER NOT NULL,"
+                " UNIQUE (user_id, question_id))"
+            )
+            self._local.db = db
+        return db
+
+    def put(self, user_id, question_id, choice_id):
+        """Queue a vote, replacing the user's queued vote on the question."""
+        self._connection().execute(
+            "INSERT OR REPLACE INTO pending_vote"
+            " (user_id, question_id, choice_id) VALUES (?, ?, ?)",
+            (user_id, question_id, choice_id),
+        )
+
+    def pending_choice(self, user_id, question_id):
+        """
+        Returns:
+            int: The id of the user's queued choice on the question, or
+                None if they have no queued vote there.
+        """
+        row = self._connection().execute(
+            "SELECT choice_id FROM pending_vote"
+            " WHERE user_id = ? AND question_id = ?",
+            (user_id, question_id),
+        ).fetchone()
+        return row[0] if row else None
+
+    def take(self, limit):
+        """
+        Returns:
+            list: Up to `limit` of the oldest queued votes as
+                (id, user_id, question_id, choice_id) tuples.
+        """
+        return self._connection().execute(
+            "SELECT id, user_id, question_id, choice_id FROM pending_vote"
+            " ORDER BY id LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def ack(self, ids):
+        """
+        Remove written votes from the journal. An entry replaced by a
+        newer vote since it was taken has a new id and stays queued.
+        """
+        self._connection().executemany(
+            "DELETE FROM pending_vote WHERE id = ?", [(i,) for i in ids]
+        )
+
+    def __len__(self):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM pending_vote").fetchone()[0]
+
+
+@lru_cache(maxsize=None)
+def _open(path):
+    return VoteQueue(path)
+
+
+def get_vote_queue():
+    """
+    Returns:
+        VoteQueue: The configured vote queue, or None when votes are
+            written synchronously.
+    """
+    path = settings.POLLS_VOTE_QUEUE
+    return _open(path) if path else None
+
+
+def pending_choice_for(user, question):
+    """
+    Returns:
+        int: The id of the choice the user has queued on the question,
+            or None if votes are not queued or they have none queued.
+    """
+    queue = get_vote_queue()
+    if queue is None or not user.is_authenticated:
+        return None
+    return queue.pending_choice(user.pk, question.pk)
+
+
+def apply_votes(votes):
+    """
+    Write a batch of queued votes to the database in one transaction.
+
+    The voters' rows are locked in id order, as vote_for_poll locks a
+    single voter's row, so queued and direct votes by the same user
+    cannot interleave. Tally changes are summed per choice and shard
+    before they are written.
+
+    Args:
+        votes (list): (id, user_id, question_id, choice_id) tuples, as
+            returned by VoteQueue.take().
+
+    Returns:
+        int: The number of votes written. Votes by deleted users or for
+            a choice that no longer belongs to the question are dropped.
+    """
+    choices = Choice.objects.select_related("question").in_bulk(
+        {choice_id for _, _, _, choice_id in votes}
+    )
+    votes = [
+        (user_id, question_id, choice_id)
+        for _, user_id, question_id, choice_id in votes
+        if choice_id in choices
+        and choices[choice_id].question_id == question_id
+    ]
+    user_ids = sorted({user_id for user_id, _, _ in votes})
+    question_ids = {question_id for _, question_id, _ in votes}
+    with transaction.atomic():
+        voters = set(
+            User.objects.select_for_update().filter(pk__in=user_ids)
+            .order_by("pk").values_list("pk", flat=True)
+        )
+        votes = [vote for vote in votes if vote[0] in voters]
+        if not votes:
+            return 0
+        previous = {
+            (user_id, question_id): choice_id
+            for user_id, question_id, choice_id in Vote.objects.filter(
+                user_id__in=user_ids, question_id__in=question_ids
+            ).values_list("user_id", "question_id", "choice_id")
+        }
+        Vote.objects.bulk_create(
+            [Vote(user_id=user_id, question_id=question_id,
+                  choice_id=choice_id)
+             for user_id, question_id, choice_id in votes],
+            update_conflicts=True,
+            unique_fields=["user", "question"],
+            update_fields=["choice"],
+        )
+        deltas = Counter()
+        for user_id, question_id, choice_id in votes:
+            old_choice_id = previous.get((user_id, question_id))
+            if old_choice_id == choice_id:
+                continue
+            shard = tally.shard_for(choices[choice_id].question, user_id)
+            if old_choice_id is not None:
+                deltas[old_choice_id, shard] -= 1
+            deltas[choice_id, shard] += 1
+        for (choice_id, shard), delta in deltas.items():
+            if delta:
+                tally.adjust(choice_id, delta, shard)
+        for question_id in question_ids:
+            page_cache.bump_results(question_id)
+    return len(votes)